@@ -0,0 +1,472 @@
+# Imports
+import argparse
+import functools
+import inspect
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Import numpy
+import numpy as np
+
+# Import pandas
+import pandas as pd
+
+# Locate the repository and make the app modules importable
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "streamlit_app"))
+
+# Keep the shared cache and the model artifacts of the benchmarks away from the app
+BENCH_DIR = Path(tempfile.mkdtemp(prefix="stockastic-bench-"))
+os.environ["STOCKASTIC_SHARED_CACHE"] = str(BENCH_DIR / "shared_cache.sqlite")
+os.environ["STOCKASTIC_MODEL_DIR"] = str(BENCH_DIR / "models")
+
+# Import the app modules
+import charts
+import correlation
+import helper
+import models
+import portfolio
+import risk
+import sectors
+import statsmodels
+from statsmodels.tsa.ar_model import AutoReg
+
+# Create the default paths of the results and the baseline
+RESULTS_PATH = ROOT / "benchmarks" / "results.json"
+BASELINE_PATH = ROOT / "benchmarks" / "baseline.json"
+
+# Create dictionary for the number of trading days in each period
+PERIOD_DAYS = {
+    "1d": 1,
+    "5d": 5,
+    "1mo": 21,
+    "3mo": 63,
+    "6mo": 126,
+    "1y": 252,
+    "2y": 504,
+    "5y": 1260,
+    "10y": 2520,
+    "max": 5040,
+}
+
+# Create the series lengths and lag orders of the modelling benchmarks
+SERIES_DAYS = (730, 1825)
+LAG_ORDERS = (30, 120, 250)
+
+
+# Function to generate a synthetic ohlcv fixture
+def synthetic_ohlcv(n_bars, freq="B", seed=0):
+    # Create the random generator
+    rng = np.random.default_rng(seed)
+
+    # Build the index ending on a fixed date so runs are reproducible
+    index = pd.date_range(
+        end=pd.Timestamp("2024-06-28", tz="Asia/Kolkata"), periods=n_bars, freq=freq
+    )
+
+    # Simulate the close as a geometric random walk
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, n_bars)))
+
+    # Build the other prices around the close
+    open_ = close * np.exp(rng.normal(0, 0.005, n_bars))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.005, n_bars)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.005, n_bars)))
+    volume = rng.integers(10_000, 1_000_000, n_bars).astype(float)
+
+    # Return the fixture
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+        index=index,
+    )
+
+
+# Function to load a recorded ohlcv fixture
+def recorded_ohlcv(path):
+    # Load the csv with the dates as index
+    fixture = pd.read_csv(path, index_col=0)
+    fixture.index = pd.to_datetime(fixture.index, utc=True).tz_convert("Asia/Kolkata")
+
+    # Return the fixture
+    return fixture
+
+
+# Create class to serve the fixtures in place of yfinance
+class StubTicker:
+    # Store the daily and intraday fixtures
+    daily = None
+    intraday = None
+
+    # Initialize the ticker
+    def __init__(self, stock_ticker):
+        # Store the ticker
+        self.ticker = stock_ticker
+
+    # Function to fetch the info of the ticker
+    @property
+    def info(self):
+        # Return the info built from the last bar
+        return {"symbol": self.ticker, "currentPrice": self.daily["Close"].iloc[-1]}
+
+    # Function to fetch the history of the ticker
+    def history(self, period="1mo", interval="1d"):
+        # Serve minute bars for the intraday intervals
+        if interval.endswith("m") and not interval.endswith("mo"):
+            return self.intraday.iloc[-PERIOD_DAYS[period] * 375 :].copy()
+
+        # Serve the daily bars otherwise
+        return self.daily.iloc[-PERIOD_DAYS[period] :].copy()
+
+
+# Function to time a callable
+def measure(func, repeat, warmup=1):
+    # Warm up the caches and imports
+    for _ in range(warmup):
+        func()
+
+    # Time the runs
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    # Return the statistics
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "max": max(timings),
+        "repeat": repeat,
+    }
+
+
+# Function to simulate a universe of stock prices
+@functools.cache
+def synthetic_universe():
+    # Simulate the prices of four thousand stocks over five years
+    rng = np.random.default_rng(2)
+    universe = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (1260, 4000)), axis=0))
+
+    # Return the prices and the group of every stock
+    return universe.astype(np.float32), rng.integers(0, 80, 4000).astype(str)
+
+
+# Function to build the benchmark cases matching a filter
+def build_cases(daily, pattern=""):
+    # Create dictionary for the cases
+    cases = {}
+
+    # Function to check whether any of the cases needing a fixture is selected
+    def wanted(*names):
+        # Return whether a name matches the filter
+        return any(pattern in name for name in names)
+
+    # Security master load
+    cases["load_stocks"] = helper.fetch_stocks
+
+    # History fetch through the stub provider bypassing the caches
+    fetch_stock_history = inspect.unwrap(helper.fetch_stock_history)
+    for period, interval in [("1d", "1m"), ("1y", "1d"), ("5y", "1d")]:
+        cases[f"fetch_history[{period},{interval}]"] = (
+            lambda p=period, i=interval: fetch_stock_history("BENCH.BO", p, i)
+        )
+
+    # Live bar merge onto a cached history
+    if wanted("merge_latest_bars[5y,1d]"):
+        latest = helper.fetch_latest_bars("BENCH.BO", "1d")
+        cases["merge_latest_bars[5y,1d]"] = lambda: helper.merge_latest_bars(
+            helper.fetch_stock_history("BENCH.BO", "5y", "1d"), latest, "1d"
+        )
+
+    # Daily reindex and forward fill
+    for days in SERIES_DAYS:
+        close = daily[["Close"]].iloc[-int(days * 252 / 365) :]
+        cases[f"resample[{days}d]"] = lambda c=close: c.asfreq(
+            "D", method="ffill"
+        ).ffill()
+
+    # Model fit and dynamic predict
+    for days in SERIES_DAYS:
+        # Prepare the training data the same way the app does
+        close = daily[["Close"]].iloc[-int(days * 252 / 365) :]
+        close = close.asfreq("D", method="ffill").ffill()
+        train = close.iloc[: int(len(close) * 0.9) + 1]["Close"]
+        test = close.iloc[int(len(close) * 0.9) :]
+        end = test.index[-1] + pd.Timedelta(days=90)
+
+        for lags in LAG_ORDERS:
+            # Fit the model
+            cases[f"ar_fit[{days}d,p={lags}]"] = lambda t=train, p=lags: AutoReg(
+                t, p
+            ).fit(cov_type="HC0")
+
+            # Skip the fitted model unless a case forecasts from it
+            names = [
+                f"{case}[{days}d,p={lags}]"
+                for case in (
+                    "ar_predict",
+                    "ar_artifact_restore",
+                    "ar_artifact_forecast",
+                )
+            ]
+            if not wanted(*names):
+                continue
+
+            # Predict with an already fitted model
+            model = AutoReg(train, lags).fit(cov_type="HC0")
+            cases[names[0]] = lambda m=model, s=test.index[0], e=end: m.predict(
+                start=s, end=e, dynamic=True
+            )
+
+            # Restore a compact artifact of the fitted model and forecast from it
+            artifact = models.ARArtifact.from_results(model, train, test.index[0])
+            cases[names[1]] = (
+                lambda d=artifact.to_bytes(): models.ARArtifact.from_bytes(d)
+            )
+            cases[names[2]] = lambda a=artifact, e=end: a.forecast(e)
+
+        # Fit every horizon of the direct forecast and forecast from the fit
+        horizon = len(test) + 90
+        cases[f"direct_fit[{days}d,h={horizon}]"] = (
+            lambda t=train, h=horizon: models.fit_direct(t, models.DIRECT_LAGS, h)
+        )
+        coefs = models.fit_direct(train, models.DIRECT_LAGS, horizon)
+        cases[f"direct_forecast[{days}d,h={horizon}]"] = (
+            lambda c=coefs, t=train, s=test.index[0]: models.forecast_direct(c, t, s)
+        )
+
+    # Whole prediction pipeline through the stub provider bypassing the caches
+    generate_stock_prediction = inspect.unwrap(helper.generate_stock_prediction)
+
+    # Function to run the pipeline without a stored artifact
+    def generate_refit():
+        # Drop the stored artifacts
+        for path in models.MODEL_DIR.glob("*.ar"):
+            path.unlink()
+
+        # Run the pipeline
+        return generate_stock_prediction("BENCH.BO")
+
+    # Time the pipeline with and without a stored artifact
+    cases["generate_stock_prediction[refit]"] = generate_refit
+    cases["generate_stock_prediction[restore]"] = lambda: generate_stock_prediction(
+        "BENCH.BO"
+    )
+
+    # Frame cache hits
+    cases["cache_hit[history]"] = lambda: helper.fetch_stock_history(
+        "BENCH.BO", "5y", "1d"
+    )
+    cases["cache_hit[prediction]"] = lambda: helper.generate_stock_prediction(
+        "BENCH.BO"
+    )
+
+    # Figure builds of the prediction page
+    history = helper.fetch_stock_history("BENCH.BO", "5y", "1d")
+    cases["figure[history]"] = lambda: charts.build_history_chart(history)
+    if wanted("figure[prediction]"):
+        prediction = helper.generate_stock_prediction("BENCH.BO")
+        cases["figure[prediction]"] = lambda: charts.build_prediction_chart(*prediction)
+
+    # Sector composites over a synthetic universe
+    if wanted("composite_returns[1260x4000]"):
+        universe, groups = synthetic_universe()
+        cases["composite_returns[1260x4000]"] = lambda: sectors.composite_returns(
+            universe, groups
+        )
+
+    # Figure build of the sector page
+    composite = history["Close"] / history["Close"].iloc[0] * 100
+    cases["figure[composite]"] = lambda: charts.build_composite_chart(
+        composite, composite, "BENCH.BO", "Sector"
+    )
+
+    # Covariance shrinkage and efficient frontier of a fifty stock basket
+    if wanted(
+        "ledoit_wolf[504x50]", "efficient_frontier[50,n=100]", "figure[frontier]"
+    ):
+        universe, _ = synthetic_universe()
+        basket = np.diff(np.log(universe[-505:, :50].astype(np.float64)), axis=0)
+        mean = basket.mean(axis=0) * 252
+        cov = portfolio.ledoit_wolf(basket)[0] * 252
+        cases["ledoit_wolf[504x50]"] = lambda: portfolio.ledoit_wolf(basket)
+        cases["efficient_frontier[50,n=100]"] = lambda: portfolio.efficient_frontier(
+            mean, cov, risk_free=0.07, n_points=100
+        )
+
+        # Figure build of the portfolio page
+        optimized = portfolio.efficient_frontier(mean, cov, risk_free=0.07)
+        summary = portfolio.summarize_portfolios(optimized["portfolios"], mean, cov)
+        assets = pd.DataFrame({"Return": mean, "Risk": np.sqrt(np.diag(cov))})
+        cases["figure[frontier]"] = lambda: charts.build_frontier_chart(
+            optimized["frontier"], summary, assets
+        )
+
+    # Rolling correlations of thirty stocks over five years
+    names = ["figure[normalized]", "figure[heatmap]", "figure[pair]"]
+    if wanted("rolling_correlation[1259x30,w=60]", *names):
+        universe, _ = synthetic_universe()
+        returns = np.diff(np.log(universe[:, :30].astype(np.float64)), axis=0)
+        cases["rolling_correlation[1259x30,w=60]"] = (
+            lambda: correlation.rolling_correlation(returns, 60)
+        )
+
+        # Figure builds of the correlation page
+        closes = pd.DataFrame(universe[:, :30], index=history.index[-1260:])
+        matrix = correlation.rolling_correlation(returns, 60)
+        cases[names[0]] = lambda: charts.build_normalized_chart(
+            correlation.normalize_closes(closes)
+        )
+        cases[names[1]] = lambda: charts.build_correlation_heatmap(
+            matrix[-1], list(range(30))
+        )
+        cases[names[2]] = lambda: charts.build_pair_correlation_chart(
+            closes.index[60:], matrix[:, 0, 1], "0 / 1"
+        )
+
+    # Volatility model fit of a stock
+    stock_returns = risk.daily_returns(history["Close"].to_numpy()[-505:])
+    cases["garch_fit[504d]"] = lambda: risk.fit_garch(stock_returns)
+
+    # Volatility model fits of a slice of the universe, cold and warm started
+    if wanted("garch_batch[1259x500]", "garch_batch_warm[1259x500]"):
+        universe, _ = synthetic_universe()
+        universe_returns = risk.daily_returns(universe[:, :500])
+        cases["garch_batch[1259x500]"] = lambda: risk.fit_garch_batch(universe_returns)
+    if wanted("garch_batch_warm[1259x500]"):
+        fitted = risk.fit_garch_batch(universe_returns)[:2]
+        cases["garch_batch_warm[1259x500]"] = lambda: risk.fit_garch_batch(
+            universe_returns, fitted
+        )
+
+    # Risk forecast of a stock bypassing the caches and its figure builds
+    forecast_risk = inspect.unwrap(risk.forecast_risk)
+    cases["forecast_risk"] = lambda: forecast_risk("BENCH.BO")
+    if wanted("figure[volatility]", "figure[var]"):
+        volatility, risk_forecast, _ = forecast_risk("BENCH.BO")
+        cases["figure[volatility]"] = lambda: charts.build_volatility_chart(
+            volatility.iloc[-252:], risk_forecast
+        )
+        cases["figure[var]"] = lambda: charts.build_var_chart(
+            risk_forecast, risk.VAR_LEVEL
+        )
+
+    # Return the selected cases
+    return {name: func for name, func in cases.items() if wanted(name)}
+
+
+# Function to compare the results against the baseline
+def compare(results, baseline, tolerance, min_delta):
+    # Create list for the regressions
+    regressions = []
+
+    # Compare every case present in both runs
+    for name, result in results["results"].items():
+        # Skip the cases missing from the baseline
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+
+        # Flag the case if it slowed down beyond the tolerance and the noise floor
+        delta = result["median"] - reference["median"]
+        if delta > min_delta and result["median"] > reference["median"] * (
+            1 + tolerance
+        ):
+            regressions.append((name, reference["median"], result["median"]))
+
+    # Return the regressions
+    return regressions
+
+
+# Run the benchmarks
+if __name__ == "__main__":
+    # Parse the arguments
+    parser = argparse.ArgumentParser(description="Stockastic benchmarks")
+    parser.add_argument("--fixture", help="recorded daily OHLCV csv to use")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default="", help="only run matching cases")
+    parser.add_argument("--output", default=str(RESULTS_PATH))
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--require-baseline",
+        action="store_true",
+        help="exit with status 2 if the baseline is missing",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta", type=float, default=0.001)
+    args = parser.parse_args()
+
+    # Run from the repository root so the app finds its data
+    os.chdir(ROOT)
+
+    # Load the fixtures
+    StubTicker.daily = (
+        recorded_ohlcv(args.fixture) if args.fixture else synthetic_ohlcv(5040)
+    )
+    StubTicker.intraday = synthetic_ohlcv(5 * 375, freq="min", seed=1)
+
+    # Serve the fixtures in place of yfinance
+    helper.yf = SimpleNamespace(Ticker=StubTicker)
+
+    # Run the cases
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "statsmodels": statsmodels.__version__,
+            "fixture": args.fixture or "synthetic",
+        },
+        "results": {},
+    }
+    for name, func in build_cases(StubTicker.daily, args.filter).items():
+        results["results"][name] = measure(func, args.repeat)
+        print(f"{name:40s} {results['results'][name]['median'] * 1000:10.2f} ms")
+
+    # Save the results
+    output = Path(args.baseline if args.save_baseline else args.output)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Saved results to {output}")
+
+    # Stop here when recording the baseline
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        sys.exit(0)
+
+    # Warn when there is no baseline, or fail if one is required
+    if not baseline_path.exists():
+        print(
+            f"\nWARNING: no baseline at {baseline_path}, regressions were not checked",
+            file=sys.stderr,
+        )
+        sys.exit(2 if args.require_baseline else 0)
+
+    # Compare against the baseline
+    regressions = compare(
+        results,
+        json.loads(baseline_path.read_text()),
+        args.tolerance,
+        args.min_delta,
+    )
+
+    # Fail loudly on regressions
+    if regressions:
+        print(f"\nPERFORMANCE REGRESSIONS (tolerance {args.tolerance:.0%}):")
+        for name, before, after in regressions:
+            print(
+                f"  {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms "
+                f"({after / before - 1:+.0%})"
+            )
+        sys.exit(1)
+
+    # Report the clean run
+    print("No regressions against the baseline")
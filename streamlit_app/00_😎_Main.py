@@ -1,10 +1,16 @@
 import streamlit as st
 
+# Import the cache pre-warming
+from prewarm import ensure_started
+
 st.set_page_config(
     page_title="Stock Prediction App",
     page_icon="😎",
 )
 
+# Start pre-warming the caches of the popular stocks
+ensure_started()
+
 st.markdown(
     """# 📈 **Stockastic**
 ### **Predicting Stocks with ML**
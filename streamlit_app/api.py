@@ -0,0 +1,371 @@
+# Imports
+import argparse
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Import the per key locks and the float32 widening of the cached frames
+from framecache import KeyLocks, widen
+
+# Import helper functions
+from helper import *
+
+# Import the tracing helpers
+from tracing import render_prometheus
+
+# Create the maximum number of cached responses
+MAX_ENTRIES = 1024
+
+
+# Create class to cache rendered responses in memory
+class ResponseCache:
+    # Initialize the cache
+    def __init__(self, ttl, max_entries=MAX_ENTRIES):
+        # Store the time to live of an entry in seconds
+        self.ttl = ttl
+
+        # Store the maximum number of entries
+        self.max_entries = max_entries
+
+        # Create the storage for the entries in recency order
+        self.entries = OrderedDict()
+
+        # Create the lock guarding the entries
+        self.lock = threading.Lock()
+
+        # Create the per key locks
+        self.key_locks = KeyLocks()
+
+    # Function to fetch a fresh entry
+    def get(self, key):
+        # Fetch the entry
+        with self.lock:
+            entry = self.entries.get(key)
+
+            # Return None if the entry is missing
+            if entry is None:
+                return None
+
+            # Drop the entry if it has expired
+            if entry["expires_at"] <= time.monotonic():
+                del self.entries[key]
+                return None
+
+            # Mark the entry as recently used
+            self.entries.move_to_end(key)
+
+        # Return the entry
+        return entry
+
+    # Function to store an entry
+    def set(self, key, entry):
+        # Store the entry as the most recently used
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+
+            # Evict the least recently used entries until the cap holds
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    # Function to fetch an entry or build it once
+    def get_or_build(self, key, build):
+        # Return the cached entry if present
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+
+        # Build the entry once even when many requests miss together, keeping the
+        # lock of the key until every waiting request has been served
+        with self.key_locks.hold(key):
+            # Check again in case another request built it meanwhile
+            entry = self.get(key)
+            if entry is not None:
+                return entry
+
+            # Build and store the entry
+            entry = build()
+            entry["expires_at"] = time.monotonic() + self.ttl
+            self.set(key, entry)
+
+        # Return the entry
+        return entry
+
+
+# Create class for errors which map to a http status
+class ApiError(Exception):
+    # Initialize the error
+    def __init__(self, status, message):
+        # Initialize the base exception
+        super().__init__(message)
+
+        # Store the status
+        self.status = status
+
+
+# Function to convert a dataframe or series into a json friendly dictionary
+def serialize_frame(data):
+    # Convert a series into a dataframe
+    if isinstance(data, pd.Series):
+        data = data.to_frame(name=data.name or "value")
+
+    # Serve the cached float32 values as the decimals they were fetched as
+    data = widen(data)
+
+    # Replace missing values with None
+    values = data.astype(object).where(data.notna(), None)
+
+    # Return the dictionary
+    return {
+        "columns": list(data.columns),
+        "index": [timestamp.isoformat() for timestamp in data.index],
+        "data": values.to_numpy().tolist(),
+    }
+
+
+# Function to build the validators of a response from its last bar
+def build_validators(key, last_bar):
+    # Build the entity tag from the request and the last bar
+    digest = hashlib.sha1(
+        json.dumps([key, last_bar.name.isoformat(), last_bar.tolist()]).encode()
+    ).hexdigest()
+
+    # Return the entity tag and the last modified time
+    return f'"{digest}"', last_bar.name.timestamp()
+
+
+# Function to fetch and validate a query parameter
+def query_param(query, name, default=None):
+    # Fetch the parameter
+    value = query.get(name, [default])[0]
+
+    # Raise error if the parameter is missing
+    if value is None:
+        raise ApiError(400, f"Missing query parameter: {name}")
+
+    # Return the parameter
+    return value
+
+
+# Function to build the history response
+def build_history(stock_ticker, period, interval):
+    # Validate the period and interval
+    periods = fetch_periods_intervals()
+    if interval not in periods.get(period, []):
+        raise ApiError(400, f"Unsupported period/interval: {period}/{interval}")
+
+    # Fetch the stock history
+    stock_data = fetch_stock_history(stock_ticker, period, interval)
+
+    # Raise error if there is no data
+    if stock_data.empty:
+        raise ApiError(404, f"No data available for {stock_ticker}")
+
+    # Build the validators
+    key = ["history", stock_ticker, period, interval]
+    etag, last_modified = build_validators(key, stock_data.iloc[-1])
+
+    # Build the payload
+    payload = {
+        "ticker": stock_ticker,
+        "period": period,
+        "interval": interval,
+        "history": serialize_frame(stock_data),
+    }
+
+    # Return the response
+    return payload, etag, last_modified
+
+
+# Function to build the info response
+def build_info(stock_ticker):
+    # Fetch the stock info
+    stock_data_info = fetch_stock_info(stock_ticker)
+
+    # Build the payload
+    payload = {"ticker": stock_ticker, "info": stock_data_info}
+
+    # Build the validators from the content as info has no bars
+    digest = hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    # Return the response
+    return payload, f'"{digest}"', time.time()
+
+
+# Function to build the forecast response
+def build_forecast(stock_ticker):
+    # Generate the stock prediction
+    train_df, test_df, forecast, predictions = generate_stock_prediction(stock_ticker)
+
+    # Raise error if there is no prediction
+    if train_df is None:
+        raise ApiError(404, f"No data available for {stock_ticker}")
+
+    # Build the validators from the last observed bar
+    key = ["forecast", stock_ticker]
+    etag, last_modified = build_validators(key, test_df.iloc[-1])
+
+    # Build the payload
+    payload = {
+        "ticker": stock_ticker,
+        "train": serialize_frame(train_df),
+        "test": serialize_frame(test_df),
+        "forecast": serialize_frame(forecast.rename("Forecast")),
+        "predictions": serialize_frame(predictions.rename("Predictions")),
+    }
+
+    # Return the response
+    return payload, etag, last_modified
+
+
+# Create dictionary for the routes with their parameters and defaults
+ROUTES = {
+    "/history": (build_history, {"ticker": None, "period": "1y", "interval": "1d"}),
+    "/info": (build_info, {"ticker": None}),
+    "/forecast": (build_forecast, {"ticker": None}),
+}
+
+
+# Create class to handle the api requests
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    # Store the response cache
+    cache = ResponseCache(ttl=60)
+
+    # Function to handle the get requests
+    def do_GET(self):
+        # Parse the url
+        url = urlparse(self.path)
+
+        # Send the stage timings without caching
+        if url.path == "/metrics":
+            return self.send_metrics()
+
+        # Fetch the route
+        route = ROUTES.get(url.path)
+        if route is None:
+            return self.send_json(404, {"error": f"Unknown endpoint: {url.path}"})
+
+        # Parse the query
+        query = parse_qs(url.query)
+        build, defaults = route
+
+        # Try to fetch the response
+        try:
+            # Keep only the parameters of the route so unknown ones share the entry
+            params = [
+                query_param(query, name, default) for name, default in defaults.items()
+            ]
+
+            # Fetch the response cached under the route and its parameters
+            key = (url.path, *params)
+            entry = self.cache.get_or_build(key, lambda: self.render(build, params))
+
+        # If the request is invalid
+        except ApiError as error:
+            return self.send_json(error.status, {"error": str(error)})
+
+        # If the upstream fails
+        except Exception as error:
+            return self.send_json(502, {"error": f"Upstream error: {error}"})
+
+        # Send not modified if the client copy is current
+        if self.is_not_modified(entry):
+            self.send_response(304)
+            self.send_validators(entry)
+            self.end_headers()
+            return
+
+        # Send the response
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(entry["body"])))
+        self.send_validators(entry)
+        self.end_headers()
+        self.wfile.write(entry["body"])
+
+    # Function to render a response into a cache entry
+    def render(self, build, params):
+        # Build the response
+        payload, etag, last_modified = build(*params)
+
+        # Return the cache entry
+        return {
+            "body": json.dumps(payload, default=str).encode(),
+            "etag": etag,
+            "last_modified": formatdate(last_modified, usegmt=True),
+            "last_modified_ts": int(last_modified),
+        }
+
+    # Function to check the conditional request headers
+    def is_not_modified(self, entry):
+        # Check the entity tag first
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return entry["etag"] in [tag.strip() for tag in if_none_match.split(",")]
+
+        # Check the modification time
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return entry["last_modified_ts"] <= since
+
+        # Return False
+        return False
+
+    # Function to send the validator headers
+    def send_validators(self, entry):
+        # Send the headers
+        self.send_header("ETag", entry["etag"])
+        self.send_header("Last-Modified", entry["last_modified"])
+        self.send_header("Cache-Control", f"max-age={self.cache.ttl}")
+
+    # Function to send the stage timings in prometheus text format
+    def send_metrics(self):
+        # Render the metrics
+        body = render_prometheus().encode()
+
+        # Send the response
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # Function to send a json response
+    def send_json(self, status, payload):
+        # Encode the payload
+        body = json.dumps(payload).encode()
+
+        # Send the response
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# Run the server
+if __name__ == "__main__":
+    # Parse the arguments
+    parser = argparse.ArgumentParser(description="Stockastic JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--ttl", type=int, default=60)
+    args = parser.parse_args()
+
+    # Configure the cache
+    ApiRequestHandler.cache = ResponseCache(ttl=args.ttl)
+
+    # Serve the requests concurrently
+    server = ThreadingHTTPServer((args.host, args.port), ApiRequestHandler)
+    server.daemon_threads = True
+    print(f"Serving Stockastic API on http://{args.host}:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,274 @@
+# Imports
+import plotly.graph_objects as go
+
+
+# Function to build the historical data graph
+def build_history_chart(stock_data):
+    # Create a plot for the historical data
+    fig = go.Figure(
+        data=[
+            go.Candlestick(
+                x=stock_data.index,
+                open=stock_data["Open"],
+                high=stock_data["High"],
+                low=stock_data["Low"],
+                close=stock_data["Close"],
+            )
+        ]
+    )
+
+    # Customize the historical data graph
+    fig.update_layout(xaxis_rangeslider_visible=False)
+
+    # Return the figure
+    return fig
+
+
+# Function to build the stock prediction graph
+def build_prediction_chart(train_df, test_df, forecast, predictions, direct=None):
+    # Create a plot for the stock prediction
+    fig = go.Figure(
+        data=[
+            go.Scatter(
+                x=train_df.index,
+                y=train_df["Close"],
+                name="Train",
+                mode="lines",
+                line=dict(color="blue"),
+            ),
+            go.Scatter(
+                x=test_df.index,
+                y=test_df["Close"],
+                name="Test",
+                mode="lines",
+                line=dict(color="orange"),
+            ),
+            go.Scatter(
+                x=forecast.index,
+                y=forecast,
+                name="Forecast",
+                mode="lines",
+                line=dict(color="red"),
+            ),
+            go.Scatter(
+                x=test_df.index,
+                y=predictions,
+                name="Test Predictions",
+                mode="lines",
+                line=dict(color="green"),
+            ),
+        ]
+    )
+
+    # Add the direct forecast to compare with the recursive one
+    if direct is not None:
+        fig.add_trace(
+            go.Scatter(
+                x=direct.index,
+                y=direct,
+                name="Direct Forecast",
+                mode="lines",
+                line=dict(color="purple", dash="dash"),
+            )
+        )
+
+    # Customize the stock prediction graph
+    fig.update_layout(xaxis_rangeslider_visible=False)
+
+    # Return the figure
+    return fig
+
+
+# Function to build the stock against composite graph
+def build_composite_chart(stock_close, composite, stock_name, group_name):
+    # Create a plot of both series rebased to 100
+    fig = go.Figure(
+        data=[
+            go.Scatter(
+                x=stock_close.index,
+                y=stock_close,
+                name=stock_name,
+                mode="lines",
+                line=dict(color="blue"),
+            ),
+            go.Scatter(
+                x=composite.index,
+                y=composite,
+                name=group_name,
+                mode="lines",
+                line=dict(color="orange"),
+            ),
+        ]
+    )
+
+    # Customize the composite graph
+    fig.update_layout(xaxis_rangeslider_visible=False, yaxis_title="Rebased to 100")
+
+    # Return the figure
+    return fig
+
+
+# Function to build the efficient frontier graph
+def build_frontier_chart(frontier, summary, assets):
+    # Create a plot of the frontier
+    fig = go.Figure(
+        data=[
+            go.Scatter(
+                x=frontier["Risk"],
+                y=frontier["Return"],
+                name="Efficient Frontier",
+                mode="lines",
+                line=dict(color="blue"),
+            ),
+            go.Scatter(
+                x=assets["Risk"],
+                y=assets["Return"],
+                name="Stocks",
+                mode="markers",
+                text=assets.index,
+                marker=dict(color="gray"),
+            ),
+        ]
+    )
+
+    # Add a marker for every optimized portfolio
+    for name, row in summary.iterrows():
+        fig.add_trace(
+            go.Scatter(
+                x=[row["Risk"]],
+                y=[row["Return"]],
+                name=name,
+                mode="markers",
+                marker=dict(size=12, symbol="star"),
+            )
+        )
+
+    # Customize the frontier graph
+    fig.update_layout(
+        xaxis_title="Annualized Risk",
+        yaxis_title="Annualized Return",
+        xaxis_tickformat=".0%",
+        yaxis_tickformat=".0%",
+    )
+
+    # Return the figure
+    return fig
+
+
+# Function to build the normalized price graph of many stocks
+def build_normalized_chart(closes):
+    # Create a plot with a line for every stock
+    fig = go.Figure(
+        data=[
+            go.Scatter(x=closes.index, y=closes[column], name=column, mode="lines")
+            for column in closes.columns
+        ]
+    )
+
+    # Customize the normalized price graph
+    fig.update_layout(xaxis_rangeslider_visible=False, yaxis_title="Rebased to 100")
+
+    # Return the figure
+    return fig
+
+
+# Function to build the correlation heatmap
+def build_correlation_heatmap(matrix, labels):
+    # Create a heatmap of the correlation matrix
+    fig = go.Figure(
+        data=[
+            go.Heatmap(
+                z=matrix,
+                x=labels,
+                y=labels,
+                zmin=-1,
+                zmax=1,
+                colorscale="RdBu",
+                reversescale=True,
+            )
+        ]
+    )
+
+    # Customize the heatmap
+    fig.update_layout(yaxis_autorange="reversed")
+
+    # Return the figure
+    return fig
+
+
+# Function to build the rolling correlation graph of a pair
+def build_pair_correlation_chart(dates, correlation, pair_name):
+    # Create a plot of the rolling correlation
+    fig = go.Figure(
+        data=[
+            go.Scatter(
+                x=dates,
+                y=correlation,
+                name=pair_name,
+                mode="lines",
+                line=dict(color="blue"),
+            )
+        ]
+    )
+
+    # Customize the pair graph
+    fig.update_layout(yaxis_range=[-1, 1], yaxis_title="Rolling Correlation")
+
+    # Return the figure
+    return fig
+
+
+# Function to build the volatility forecast graph
+def build_volatility_chart(history, forecast):
+    # Create a plot of the filtered and forecast volatilities of both models
+    fig = go.Figure()
+    for name, color in [("EWMA", "blue"), ("GARCH", "orange")]:
+        fig.add_trace(
+            go.Scatter(
+                x=history.index,
+                y=history[f"{name} Volatility"],
+                name=f"{name} Volatility",
+                mode="lines",
+                line=dict(color=color),
+            )
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=forecast.index,
+                y=forecast[f"{name} Volatility"],
+                name=f"{name} Forecast",
+                mode="lines",
+                line=dict(color=color, dash="dash"),
+            )
+        )
+
+    # Customize the volatility graph
+    fig.update_layout(
+        xaxis_rangeslider_visible=False, yaxis_title="Annualized Volatility (%)"
+    )
+
+    # Return the figure
+    return fig
+
+
+# Function to build the value at risk graph
+def build_var_chart(forecast, level):
+    # Create a plot of the value at risk over the horizon of both models
+    fig = go.Figure(
+        data=[
+            go.Scatter(
+                x=forecast.index,
+                y=forecast[f"{name} VaR"],
+                name=f"{name} VaR",
+                mode="lines",
+                line=dict(color=color),
+            )
+            for name, color in [("EWMA", "blue"), ("GARCH", "orange")]
+        ]
+    )
+
+    # Customize the value at risk graph
+    fig.update_layout(yaxis_title=f"{level:.0%} Value at Risk (%)")
+
+    # Return the figure
+    return fig
@@ -0,0 +1,76 @@
+# Imports
+import numpy as np
+
+# Create the maximum number of stocks whose correlation matrices are kept per date
+MAX_STOCKS = 50
+
+
+# Function to compute the rolling correlation matrices of many series at once
+def rolling_correlation(returns, window, min_periods=None):
+    # Require most of the window to hold observations by default
+    min_periods = min_periods or max(2, int(window * 0.8))
+
+    # Center every series to limit cancellation in the running sums
+    returns = np.asarray(returns, dtype=np.float64)
+    valid = np.isfinite(returns)
+    x = np.where(valid, returns - np.nanmean(returns, axis=0), 0.0)
+    v = valid.astype(np.float64)
+
+    # Function to compute the windowed sums from a running sum
+    def windowed(values):
+        # Prepend a zero row so every window is a difference of two rows
+        cumsum = np.cumsum(values, axis=0)
+        cumsum = np.concatenate([np.zeros((1, *cumsum.shape[1:])), cumsum])
+        return cumsum[window:] - cumsum[:-window]
+
+    # Function to compute the correlations from the windowed sums
+    def correlate(n, sx, sy, sxx, syy, sxy):
+        # Compute the correlations in place of the cross sums
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sxy -= sx * sy / n
+            sxy /= np.sqrt((sxx - sx**2 / n) * (syy - sy**2 / n))
+
+        # Mask the windows with too few observations
+        sxy[np.broadcast_to(n < min_periods, sxy.shape)] = np.nan
+
+        # Return the correlations
+        return sxy
+
+    # Compute every pair in O(n) as if no observation were missing
+    s = windowed(x)
+    ss = windowed(x**2)
+    corr = correlate(
+        np.float64(window),
+        s[:, :, None],
+        s[:, None, :],
+        ss[:, :, None],
+        ss[:, None, :],
+        windowed(x[:, :, None] * x[:, None, :]),
+    )
+
+    # Recompute pairwise only the pairs with a series missing observations
+    missing = np.flatnonzero(~valid.all(axis=0))
+    if len(missing):
+        # Compute the pairwise counts and sums of those series against every series
+        xm, vm = x[:, missing, None], v[:, missing, None]
+        rows = correlate(
+            windowed(vm * v[:, None, :]),
+            windowed(xm * v[:, None, :]),
+            windowed(vm * x[:, None, :]),
+            windowed(xm**2 * v[:, None, :]),
+            windowed(vm * (x**2)[:, None, :]),
+            windowed(xm * x[:, None, :]),
+        )
+
+        # Replace their rows and columns
+        corr[:, missing, :] = rows
+        corr[:, :, missing] = rows.transpose(0, 2, 1)
+
+    # Return the correlations with the windows ending at every date
+    return np.clip(corr, -1.0, 1.0, out=corr)
+
+
+# Function to rebase the closes of many stocks to 100
+def normalize_closes(closes):
+    # Return every series divided by its first observation
+    return closes / closes.bfill().iloc[0] * 100
@@ -0,0 +1,362 @@
+# Imports
+import contextvars
+import functools
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Import numpy
+import numpy as np
+
+# Import pandas
+import pandas as pd
+
+
+# Create class to hold a dataframe or series in a compact read-only form
+class CompactFrame:
+    # Initialize the compact frame
+    def __init__(self, index, values, columns, name=None, is_series=False):
+        # Store the immutable index shared by every reader
+        self.index = index
+
+        # Store the float32 values as a read-only column-major block
+        self.values = values
+        self.values.flags.writeable = False
+
+        # Store the labels
+        self.columns = columns
+        self.name = name
+        self.is_series = is_series
+
+    # Function to build a compact frame from a dataframe or series
+    @classmethod
+    def from_pandas(cls, data):
+        # Treat a series as a single column frame
+        is_series = isinstance(data, pd.Series)
+        frame = data.to_frame() if is_series else data
+
+        # Convert the values to a column-major float32 block
+        values = np.asfortranarray(frame.to_numpy(dtype=np.float32))
+
+        # Return the compact frame sharing the immutable int64 epoch index
+        return cls(
+            frame.index,
+            values,
+            list(frame.columns),
+            name=data.name if is_series else None,
+            is_series=is_series,
+        )
+
+    # Function to restore a compact frame loaded from disk
+    def __setstate__(self, state):
+        # Restore the attributes
+        self.__dict__.update(state)
+
+        # Keep the values read-only
+        self.values.flags.writeable = False
+
+    # Function to hand out a pandas view over the cached buffers
+    def to_pandas(self):
+        # Return a series without copying the values
+        if self.is_series:
+            return pd.Series(
+                self.values[:, 0], index=self.index, name=self.name, copy=False
+            )
+
+        # Return a dataframe without copying the values
+        return pd.DataFrame(
+            self.values, index=self.index, columns=self.columns, copy=False
+        )
+
+    # Function to fetch the size of the buffers
+    @property
+    def nbytes(self):
+        # Return the size of the values and the index
+        return self.values.nbytes + self.index.nbytes
+
+
+# Function to convert a result into its compact form
+def compact(value):
+    # Convert the frames and series
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return CompactFrame.from_pandas(value)
+
+    # Convert the items of a tuple
+    if isinstance(value, tuple):
+        return tuple(compact(item) for item in value)
+
+    # Return anything else unchanged
+    return value
+
+
+# Function to convert a compact result back into pandas objects
+def expand(value):
+    # Expand the compact frames
+    if isinstance(value, CompactFrame):
+        return value.to_pandas()
+
+    # Expand the items of a tuple
+    if isinstance(value, tuple):
+        return tuple(expand(item) for item in value)
+
+    # Return anything else unchanged
+    return value
+
+
+# Function to restore float32 values to the float64 of their shortest decimal form
+def widen(data):
+    # Widen a scalar
+    if isinstance(data, (int, float, np.number)):
+        return float(str(data)) if isinstance(data, np.float32) else float(data)
+
+    # Widen a float32 series
+    if isinstance(data, pd.Series):
+        return data.astype(str).astype(np.float64) if data.dtype == np.float32 else data
+
+    # Return a frame without float32 columns unchanged
+    columns = data.columns[data.dtypes == np.float32]
+    if columns.empty:
+        return data
+
+    # Return a copy with the float32 columns widened
+    data = data.copy()
+    data[columns] = data[columns].astype(str).astype(np.float64)
+    return data
+
+
+# Function to estimate the size of a compact result
+def value_nbytes(value):
+    # Return the size of the buffers of a compact frame
+    if isinstance(value, CompactFrame):
+        return value.nbytes
+
+    # Return the size of the items of a tuple
+    if isinstance(value, tuple):
+        return sum(value_nbytes(item) for item in value)
+
+    # Return the shallow size of anything else
+    return sys.getsizeof(value)
+
+
+# Create class for per key locks which are dropped once no thread holds or waits on them
+class KeyLocks:
+    # Initialize the locks
+    def __init__(self):
+        # Create the lock guarding the storage
+        self.lock = threading.Lock()
+
+        # Create the storage for the lock of every key and its number of users
+        self.locks = {}
+
+    # Function to hold the lock of a key
+    @contextmanager
+    def hold(self, key):
+        # Fetch the lock of the key and count this thread as a user
+        with self.lock:
+            entry = self.locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+
+        # Hold the lock
+        try:
+            with entry[0]:
+                yield
+
+        # Drop the lock once the last user is done with it
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self.locks[key]
+
+    # Function to fetch the number of keys with a lock
+    def __len__(self):
+        # Return the number of locks
+        with self.lock:
+            return len(self.locks)
+
+
+# Create class for a size-aware least recently used cache
+class FrameCache:
+    # Initialize the cache
+    def __init__(self, max_bytes):
+        # Store the byte budget
+        self.max_bytes = max_bytes
+
+        # Create the storage for the entries in recency order
+        self.entries = OrderedDict()
+
+        # Create the counters
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Create the lock guarding the entries
+        self.lock = threading.Lock()
+
+        # Create the per key locks
+        self.key_locks = KeyLocks()
+
+    # Function to hold the lock of a key
+    def key_lock(self, key):
+        # Return the lock which is dropped once no thread needs it
+        return self.key_locks.hold(key)
+
+    # Function to remove an entry
+    def _remove(self, key):
+        # Remove the entry and release its bytes
+        value, size, expires_at = self.entries.pop(key)
+        self.current_bytes -= size
+
+    # Function to fetch a fresh entry, counting the lookup unless it is a recheck
+    def get(self, key, count=True):
+        # Fetch the entry
+        with self.lock:
+            entry = self.entries.get(key)
+
+            # Count a miss if the entry is missing
+            if entry is None:
+                self.misses += count
+                return None
+
+            # Drop the entry and count a miss if it has expired
+            if entry[2] <= time.monotonic():
+                self._remove(key)
+                self.misses += count
+                return None
+
+            # Mark the entry as recently used
+            self.entries.move_to_end(key)
+            self.hits += count
+
+        # Return the value
+        return entry[0]
+
+    # Function to store an entry
+    def set(self, key, value, ttl):
+        # Skip the values which would not fit in the budget at all
+        size = value_nbytes(value)
+        if size > self.max_bytes:
+            return
+
+        # Store the entry
+        with self.lock:
+            # Replace the previous entry
+            if key in self.entries:
+                self._remove(key)
+
+            # Add the entry as the most recently used
+            self.entries[key] = (value, size, time.monotonic() + ttl)
+            self.current_bytes += size
+
+            # Evict the least recently used entries until the budget holds
+            while self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    # Function to clear the cache
+    def clear(self):
+        # Remove all the entries
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    # Function to fetch the cache statistics
+    def stats(self):
+        # Return the statistics
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Create the cache shared by every session of the process
+frame_cache = FrameCache(
+    int(os.environ.get("STOCKASTIC_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+)
+
+
+# Create the storage for the expiry of a value served by an inner cache
+_inner_expiry = contextvars.ContextVar("stockastic_inner_expiry", default=None)
+
+
+# Function to pass the wall clock expiry of a served value to the outer cache
+def limit_expiry(expires_at):
+    # Store the expiry for the wrapper computing the value
+    _inner_expiry.set(expires_at)
+
+
+# Function to check whether a result is worth caching
+def is_cacheable(value):
+    # Skip the failed results
+    if value is None:
+        return False
+
+    # Skip the tuples of failed results
+    if isinstance(value, tuple):
+        return any(item is not None for item in value)
+
+    # Return True
+    return True
+
+
+# Function to cache the results of a function in the shared frame cache
+def cached(ttl):
+    # Create the decorator
+    def decorator(func):
+        # Create the wrapper
+        @functools.wraps(func)
+        def wrapper(*args):
+            # Build the cache key
+            key = (func.__qualname__, args)
+
+            # Return the cached value if present
+            value = frame_cache.get(key)
+            if value is not None:
+                return expand(value)
+
+            # Compute the value once even when many sessions miss together
+            with frame_cache.key_lock(key):
+                # Check again in case another session computed it meanwhile
+                value = frame_cache.get(key, count=False)
+                if value is not None:
+                    return expand(value)
+
+                # Compute the value and note the expiry of an inner cache serving it
+                token = _inner_expiry.set(None)
+                try:
+                    result = func(*args)
+                    expires_at = _inner_expiry.get()
+                finally:
+                    _inner_expiry.reset(token)
+
+                # Return failed results without caching them
+                if not is_cacheable(result):
+                    return result
+
+                # Keep the value no longer than the inner cache would have
+                seconds = ttl(*args) if callable(ttl) else ttl
+                if expires_at is not None:
+                    seconds = min(seconds, expires_at - time.time())
+
+                # Store the compact value
+                value = compact(result)
+                if seconds > 0:
+                    frame_cache.set(key, value, seconds)
+
+            # Return the value in the same form as a cache hit
+            return expand(value)
+
+        # Return the wrapper
+        return wrapper
+
+    # Return the decorator
+    return decorator
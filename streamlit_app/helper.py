@@ -12,11 +12,33 @@ import yfinance as yf
 # Import the required libraries
 from statsmodels.tsa.ar_model import AutoReg
 
+# Import the shared frame cache
+from framecache import cached
+
+# Import the model artifacts
+from models import (
+    AUTOREG_LAGS,
+    ARArtifact,
+    artifact_name,
+    load_artifact,
+    store_artifact,
+)
+
+# Import the shared disk cache
+from sharedcache import shared_cached
+
+# Import the tracing helpers
+from tracing import span
+
+# Create the time after which the daily bar of the Indian markets is complete
+MARKET_CLOSE = dt.time(15, 45)
+
 
 # Create function to fetch stock name and id
 def fetch_stocks():
     # Load the data
-    df = pd.read_csv(Path.cwd() / "data" / "equity_issuers.csv")
+    with span("load_stocks"):
+        df = pd.read_csv(Path.cwd() / "data" / "equity_issuers.csv")
 
     # Filter the data
     df = df[["Security Code", "Issuer Name"]]
@@ -49,12 +71,14 @@ def fetch_periods_intervals():
 
 
 # Function to fetch the stock info
+@shared_cached(ttl=15 * 60)
 def fetch_stock_info(stock_ticker):
     # Pull the data for the first security
     stock_data = yf.Ticker(stock_ticker)
 
     # Extract full of the stock
-    stock_data_info = stock_data.info
+    with span("yahoo_info", ticker=stock_ticker):
+        stock_data_info = stock_data.info
 
     # Function to safely get value from dictionary or return "N/A"
     def safe_get(data_dict, key):
@@ -139,21 +163,109 @@ def fetch_stock_info(stock_ticker):
     return stock_data_info
 
 
+# Function to fetch how long a stock history stays fresh in seconds
+def history_ttl(stock_ticker, period, interval):
+    # Keep the intraday bars for a minute and the rest for fifteen minutes
+    return 60 if interval.endswith("m") else 15 * 60
+
+
 # Function to fetch the stock history
+@cached(ttl=history_ttl)
+@shared_cached(ttl=history_ttl)
 def fetch_stock_history(stock_ticker, period, interval):
     # Pull the data for the first security
     stock_data = yf.Ticker(stock_ticker)
 
     # Extract full of the stock
-    stock_data_history = stock_data.history(period=period, interval=interval)[
-        ["Open", "High", "Low", "Close"]
-    ]
+    with span("yahoo_history", ticker=stock_ticker, period=period, interval=interval):
+        stock_data_history = stock_data.history(period=period, interval=interval)[
+            ["Open", "High", "Low", "Close"]
+        ]
 
     # Return the stock data
     return stock_data_history
 
 
+# Create dictionary for the length of the multi-day bars
+BAR_LENGTHS = {
+    "5d": pd.Timedelta(days=5),
+    "1wk": pd.Timedelta(weeks=1),
+    "1mo": pd.DateOffset(months=1),
+}
+
+
+# Function to fetch the bars of the latest session
+@cached(ttl=10)
+def fetch_latest_bars(stock_ticker, interval):
+    # Pull the data for the first security
+    stock_data = yf.Ticker(stock_ticker)
+
+    # Extract the minute or intraday bars of the latest session only
+    with span("yahoo_latest", ticker=stock_ticker, interval=interval):
+        latest = stock_data.history(
+            period="1d", interval=interval if interval.endswith("m") else "1m"
+        )[["Open", "High", "Low", "Close"]]
+
+    # Return the intraday bars as they are
+    if interval.endswith("m") or latest.empty:
+        return latest
+
+    # Return the session aggregated into a single bar
+    return pd.DataFrame(
+        {
+            "Open": [latest["Open"].iloc[0]],
+            "High": [latest["High"].max()],
+            "Low": [latest["Low"].min()],
+            "Close": [latest["Close"].iloc[-1]],
+        },
+        index=[latest.index[0].normalize()],
+    )
+
+
+# Function to apply the latest bars to a stock history
+def merge_latest_bars(stock_data, latest, interval):
+    # Return the history if there is nothing to apply
+    if latest.empty or stock_data.empty:
+        return stock_data
+
+    # Replace the bars of the latest session for the intraday and daily intervals
+    if interval not in BAR_LENGTHS:
+        return pd.concat([stock_data[stock_data.index < latest.index[0]], latest])
+
+    # Append a new bar if the session starts a new multi-day bar
+    last_start = stock_data.index[-1]
+    if latest.index[0] >= last_start + BAR_LENGTHS[interval]:
+        return pd.concat([stock_data, latest])
+
+    # Return the history if the session is older than the last bar
+    if latest.index[0] < last_start:
+        return stock_data
+
+    # Fold the session into the last multi-day bar
+    last_bar = stock_data.iloc[-1].copy()
+    last_bar["High"] = max(last_bar["High"], latest["High"].iloc[0])
+    last_bar["Low"] = min(last_bar["Low"], latest["Low"].iloc[0])
+    last_bar["Close"] = latest["Close"].iloc[0]
+    return pd.concat([stock_data.iloc[:-1], last_bar.to_frame().T])
+
+
+# Function to fetch how long a stock prediction stays fresh in seconds
+def prediction_ttl(stock_ticker):
+    # Fetch the time until the next close of the market
+    now = pd.Timestamp.now(tz="Asia/Kolkata")
+    close = now.normalize() + pd.Timedelta(
+        hours=MARKET_CLOSE.hour, minutes=MARKET_CLOSE.minute
+    )
+
+    # Keep the prediction for an hour or until the daily bar closes
+    if now < close:
+        return min(60 * 60, (close - now).total_seconds())
+    return 60 * 60
+
+
 # Function to generate the stock prediction
+@cached(ttl=prediction_ttl)
+@shared_cached(ttl=prediction_ttl)
 def generate_stock_prediction(stock_ticker):
     # Try to generate the predictions
     try:
@@ -161,35 +273,47 @@ def generate_stock_prediction(stock_ticker):
         stock_data = yf.Ticker(stock_ticker)
 
         # Extract the data for last 1yr with 1d interval
-        stock_data_hist = stock_data.history(period="2y", interval="1d")
+        with span("yahoo_history", ticker=stock_ticker, period="2y", interval="1d"):
+            stock_data_hist = stock_data.history(period="2y", interval="1d")
 
         # Clean the data for to keep only the required columns
         stock_data_close = stock_data_hist[["Close"]]
 
-        # Change frequency to day
-        stock_data_close = stock_data_close.asfreq("D", method="ffill")
+        # Resample the data to daily frequency
+        with span("resample", ticker=stock_ticker, period="2y", interval="1d"):
+            # Change frequency to day
+            stock_data_close = stock_data_close.asfreq("D", method="ffill")
 
-        # Fill missing values
-        stock_data_close = stock_data_close.ffill()
+            # Fill missing values
+            stock_data_close = stock_data_close.ffill()
 
         # Define training and testing area
         train_df = stock_data_close.iloc[: int(len(stock_data_close) * 0.9) + 1]  # 90%
         test_df = stock_data_close.iloc[int(len(stock_data_close) * 0.9) :]  # 10%
 
-        # Define training model
-        model = AutoReg(train_df["Close"], 250).fit(cov_type="HC0")
-
-        # Predict data for test data
-        predictions = model.predict(
-            start=test_df.index[0], end=test_df.index[-1], dynamic=True
-        )
-
-        # Predict 90 days into the future
-        forecast = model.predict(
-            start=test_df.index[0],
-            end=test_df.index[-1] + dt.timedelta(days=90),
-            dynamic=True,
-        )
+        # Restore the model fitted on the same training window if it was stored
+        name = artifact_name(stock_ticker, train_df["Close"], AUTOREG_LAGS)
+        with span("restore", ticker=stock_ticker, period="2y", interval="1d"):
+            artifact = load_artifact(name)
+
+        # Define training model otherwise
+        if artifact is None:
+            with span("fit", ticker=stock_ticker, period="2y", interval="1d"):
+                model = AutoReg(train_df["Close"], AUTOREG_LAGS).fit(cov_type="HC0")
+
+            # Store only what the forecast needs
+            artifact = ARArtifact.from_results(
+                model, train_df["Close"], test_df.index[0], {"ticker": stock_ticker}
+            )
+            store_artifact(name, artifact)
+
+        # Predict the test data and the future
+        with span("predict", ticker=stock_ticker, period="2y", interval="1d"):
+            # Predict dynamically from the start of the test data to 90 days ahead
+            forecast = artifact.forecast(test_df.index[-1] + dt.timedelta(days=90))
+
+            # Predict data for test data
+            predictions = forecast.loc[: test_df.index[-1]]
 
         # Return the required data
         return train_df, test_df, forecast, predictions
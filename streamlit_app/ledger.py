@@ -0,0 +1,308 @@
+# Imports
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+# Import numpy
+import numpy as np
+
+# Import pandas
+import pandas as pd
+
+# Import the float32 widening of the cached frames
+from framecache import widen
+
+# Import the market close
+from helper import MARKET_CLOSE
+
+# Import the lag orders of the models
+from models import AUTOREG_LAGS, DIRECT_LAGS
+
+# Create the path of the ledger database
+LEDGER_PATH = Path(
+    os.environ.get("STOCKASTIC_LEDGER", Path.cwd() / "data" / "ledger.sqlite")
+)
+
+# Create the number of seconds to wait for the write lock of the ledger
+LOCK_TIMEOUT = 5
+
+# Create dictionary for the config of the autoregressive forecast
+AUTOREG_CONFIG = {
+    "model": "AutoReg",
+    "lags": AUTOREG_LAGS,
+    "history": "2y",
+    "train": 0.9,
+}
+
+# Create dictionary for the config of the direct multi-horizon forecast
+DIRECT_CONFIG = {
+    "model": "Direct",
+    "lags": DIRECT_LAGS,
+    "history": "2y",
+    "train": 0.9,
+}
+
+# Create the storage for the per thread connections
+_local = threading.local()
+
+
+# Function to fetch the ledger connection of the current thread
+def connection():
+    # Return the existing connection
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        return conn
+
+    # Create the database folder
+    LEDGER_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+    # Open the database in autocommit mode
+    conn = sqlite3.connect(LEDGER_PATH, timeout=LOCK_TIMEOUT, isolation_level=None)
+
+    # Let readers and the writer work concurrently
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    # Create the append-only table of the issued forecasts
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS forecasts ("
+        "id INTEGER PRIMARY KEY, ticker TEXT NOT NULL, config TEXT NOT NULL, "
+        "origin INTEGER NOT NULL, origin_close REAL NOT NULL, "
+        "horizon INTEGER NOT NULL, path BLOB NOT NULL, "
+        "scored INTEGER NOT NULL DEFAULT 0, "
+        "UNIQUE (ticker, config, origin))"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS open_forecasts ON forecasts (ticker, scored)"
+    )
+
+    # Create the table of the running error statistics
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS stats ("
+        "ticker TEXT NOT NULL, config TEXT NOT NULL, "
+        "n INTEGER NOT NULL DEFAULT 0, hits INTEGER NOT NULL DEFAULT 0, "
+        "abs_err REAL NOT NULL DEFAULT 0, sq_err REAL NOT NULL DEFAULT 0, "
+        "abs_pct_err REAL NOT NULL DEFAULT 0, "
+        "PRIMARY KEY (ticker, config))"
+    )
+
+    # Store the connection
+    _local.conn = conn
+
+    # Return the connection
+    return conn
+
+
+# Function to convert a date into days since the epoch
+def to_day(date):
+    # Return the day number
+    return int(np.datetime64(pd.Timestamp(date).date(), "D").astype(np.int64))
+
+
+# Function to record an issued forecast
+def record_forecast(stock_ticker, config, origin, origin_close, path):
+    # Skip the write if the forecast was already recorded
+    conn = connection()
+    config = json.dumps(config, sort_keys=True)
+    if conn.execute(
+        "SELECT 1 FROM forecasts WHERE ticker = ? AND config = ? AND origin = ?",
+        (stock_ticker, config, to_day(origin)),
+    ).fetchone():
+        return
+
+    # Store the path as packed float32 values, one per day after the origin
+    values = np.asarray(path, dtype=np.float32)
+
+    # Append the forecast unless another worker recorded it meanwhile
+    conn.execute(
+        "INSERT OR IGNORE INTO forecasts "
+        "(ticker, config, origin, origin_close, horizon, path) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            stock_ticker,
+            config,
+            to_day(origin),
+            widen(origin_close),
+            len(values),
+            values.tobytes(),
+        ),
+    )
+
+
+# Function to drop the bar of the session which has not closed yet
+def settled(closes):
+    # Keep every bar once the market has closed
+    now = pd.Timestamp.now(tz="Asia/Kolkata")
+    if now.time() >= MARKET_CLOSE:
+        return closes
+
+    # Return the bars before today
+    return closes[closes.index.date < now.date()]
+
+
+# Function to score the open forecasts of a stock against realized closes
+def record_realized(stock_ticker, closes):
+    # Keep the last close of every trading session so days without one are not scored
+    closes = closes.dropna()
+    days = pd.DatetimeIndex(closes.index.date).values.astype("datetime64[D]")
+    days, last = np.unique(days.astype(np.int64)[::-1], return_index=True)
+    realized = closes.to_numpy(dtype=np.float64)[::-1][last]
+    first_day, last_day = days[0], days[-1]
+
+    # Query for the forecasts with days realized since they were last scored
+    query = (
+        "SELECT id, config, origin, origin_close, horizon, path, scored "
+        "FROM forecasts WHERE ticker = ? AND scored < horizon "
+        "AND origin + scored < ?"
+    )
+
+    # Skip the write lock if no forecast has a newly realized day
+    conn = connection()
+    if not conn.execute(query + " LIMIT 1", (stock_ticker, int(last_day))).fetchone():
+        return
+
+    # Update the forecasts and the statistics in one transaction
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Fetch the forecasts again now that no other worker can score them
+        rows = conn.execute(query, (stock_ticker, int(last_day))).fetchall()
+
+        # Create dictionary for the statistic deltas of every config
+        deltas = {}
+
+        # Score the newly realized days of every forecast
+        for row_id, config, origin, origin_close, horizon, path, scored in rows:
+            # Find the unscored days covered by the realized closes
+            start = max(scored, int(first_day) - origin - 1)
+            end = min(horizon, int(last_day) - origin)
+            if end <= start:
+                continue
+
+            # Compare the forecast with the closes of the sessions in those days
+            lo, hi = np.searchsorted(days, [origin + 1 + start, origin + 1 + end])
+            predicted = np.frombuffer(path, dtype=np.float32)[days[lo:hi] - origin - 1]
+            actual = realized[lo:hi]
+            error = predicted - actual
+            hits = np.sign(predicted - origin_close) == np.sign(actual - origin_close)
+
+            # Accumulate the deltas
+            delta = deltas.setdefault(config, np.zeros(5))
+            delta += (
+                len(error),
+                hits.sum(),
+                np.abs(error).sum(),
+                (error**2).sum(),
+                (np.abs(error) / actual).sum(),
+            )
+
+            # Move the scored pointer forward
+            conn.execute("UPDATE forecasts SET scored = ? WHERE id = ?", (end, row_id))
+
+        # Add the deltas to the running statistics
+        for config, (n, hits, abs_err, sq_err, abs_pct_err) in deltas.items():
+            conn.execute(
+                "INSERT INTO stats (ticker, config, n, hits, abs_err, sq_err, "
+                "abs_pct_err) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (ticker, config) DO UPDATE SET "
+                "n = n + excluded.n, hits = hits + excluded.hits, "
+                "abs_err = abs_err + excluded.abs_err, "
+                "sq_err = sq_err + excluded.sq_err, "
+                "abs_pct_err = abs_pct_err + excluded.abs_pct_err",
+                (stock_ticker, config, int(n), int(hits), abs_err, sq_err, abs_pct_err),
+            )
+
+        # Commit the transaction
+        conn.execute("COMMIT")
+
+    # If anything fails
+    except Exception:
+        # Discard the partial update
+        conn.execute("ROLLBACK")
+        raise
+
+
+# Function to record the forecasts of a prediction and score the earlier ones
+def record_prediction(stock_ticker, session_closes, test_df, forecasts):
+    # Keep the closes of the sessions which have closed at their fetched decimals, as
+    # the calendar days filled in for the model would be scored like sessions
+    closes = widen(settled(session_closes))
+
+    # Record the forecast of every model if their origin is a closed session
+    origin = test_df.index[-1]
+    if len(closes) and closes.index[-1] == origin:
+        for config, forecast in forecasts:
+            record_forecast(
+                stock_ticker,
+                config,
+                origin,
+                closes.iloc[-1],
+                forecast[forecast.index > origin],
+            )
+
+    # Score the open forecasts against the realized closes
+    if len(closes):
+        record_realized(stock_ticker, closes)
+
+
+# Function to record a prediction and ignore database errors
+def safe_record_prediction(stock_ticker, session_closes, test_df, forecasts):
+    # Try to record the prediction
+    try:
+        record_prediction(stock_ticker, session_closes, test_df, forecasts)
+
+    # If the ledger is locked or read-only the forecasts are recorded next time
+    except (sqlite3.Error, OSError):
+        pass
+
+
+# Function to build a readable label for a model config
+def config_label(config):
+    # Parse the stored config
+    config = json.loads(config)
+
+    # Return the model with its settings
+    settings = ", ".join(f"{k}={v}" for k, v in config.items() if k != "model")
+    return f"{config['model']}({settings})"
+
+
+# Function to fetch the accuracy statistics
+def fetch_accuracy(stock_ticker=None):
+    # Aggregate the statistics of a stock or of every stock
+    query = (
+        "SELECT config, SUM(n), SUM(hits), SUM(abs_err), SUM(sq_err), "
+        "SUM(abs_pct_err) FROM stats"
+    )
+    params = ()
+    if stock_ticker is not None:
+        query += " WHERE ticker = ?"
+        params = (stock_ticker,)
+    rows = connection().execute(query + " GROUP BY config", params).fetchall()
+
+    # Return the statistics per model config
+    return pd.DataFrame(
+        [
+            {
+                "Model": config_label(config),
+                "Scored Days": n,
+                "Hit Rate": hits / n,
+                "MAE": abs_err / n,
+                "RMSE": np.sqrt(sq_err / n),
+                "MAPE": abs_pct_err / n,
+            }
+            for config, n, hits, abs_err, sq_err, abs_pct_err in rows
+            if n
+        ]
+    )
+
+
+# Function to fetch the accuracy statistics and treat database errors as no data
+def safe_fetch_accuracy(stock_ticker=None):
+    # Try to fetch the statistics
+    try:
+        return fetch_accuracy(stock_ticker)
+
+    # If the ledger is unavailable
+    except (sqlite3.Error, OSError):
+        return pd.DataFrame()
@@ -0,0 +1,259 @@
+# Imports
+import json
+import os
+import struct
+import zlib
+from pathlib import Path
+
+# Import numpy
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Import pandas
+import pandas as pd
+
+# Import scipy
+from scipy.linalg import qr, solve_triangular
+from scipy.signal import lfilter
+
+# Create the folder of the stored model artifacts
+MODEL_DIR = Path(
+    os.environ.get("STOCKASTIC_MODEL_DIR", Path.cwd() / "data" / "cache" / "models")
+)
+
+# Create the magic bytes and the version of the artifact format
+MAGIC = b"SKAR"
+VERSION = 1
+
+# Create the layout of the fixed prefix: magic, version and header length
+PREFIX = struct.Struct("<4sHI")
+
+# Create tuple for the supported trends
+TRENDS = ("n", "c")
+
+# Create the number of lags of the recursive autoregressive forecast
+AUTOREG_LAGS = 250
+
+# Create the number of lags shared by every horizon of the direct forecast
+DIRECT_LAGS = 30
+
+
+# Create class for the parameters an autoregressive model needs to forecast
+class ARArtifact:
+    # Initialize the artifact
+    def __init__(self, params, history, start, trend="c", meta=None):
+        # Store the coefficients with the constant first if there is one
+        self.params = np.ascontiguousarray(params, dtype=np.float64)
+
+        # Store the observations preceding the first forecast day, oldest first
+        self.history = np.ascontiguousarray(history, dtype=np.float64)
+
+        # Store the first forecast day and the trend
+        self.start = pd.Timestamp(start)
+        self.trend = trend
+
+        # Store the metadata
+        self.meta = meta or {}
+
+    # Function to fetch the number of lags
+    @property
+    def lags(self):
+        # Return the number of lag coefficients
+        return len(self.history)
+
+    # Function to build the artifact from fitted autoreg results
+    @classmethod
+    def from_results(cls, results, series, start, meta=None):
+        # Fetch the model
+        model = results.model
+
+        # Check that the model is a plain autoregression
+        if model.trend not in TRENDS or model.seasonal or model.exog is not None:
+            raise ValueError("Only plain autoregressions are supported")
+
+        # Check that the lags are consecutive
+        lags = len(model.ar_lags)
+        if list(model.ar_lags) != list(range(1, lags + 1)):
+            raise ValueError("Only consecutive lags are supported")
+
+        # Keep the observations before the first forecast day
+        history = series[series.index < start].to_numpy(dtype=np.float64)[-lags:]
+
+        # Return the artifact
+        return cls(
+            np.asarray(results.params),
+            history,
+            start,
+            model.trend,
+            {**(meta or {}), "nobs": int(results.nobs)},
+        )
+
+    # Function to serialize the artifact
+    def to_bytes(self):
+        # Build the header with the metadata
+        header = json.dumps(
+            {
+                "trend": self.trend,
+                "lags": self.lags,
+                "n_params": len(self.params),
+                "start": self.start.tz_localize(None).isoformat(),
+                "tz": None if self.start.tz is None else str(self.start.tz),
+                "meta": self.meta,
+            }
+        ).encode()
+
+        # Return the prefix, the header and the raw arrays
+        return b"".join(
+            [
+                PREFIX.pack(MAGIC, VERSION, len(header)),
+                header,
+                self.params.tobytes(),
+                self.history.tobytes(),
+            ]
+        )
+
+    # Function to deserialize an artifact
+    @classmethod
+    def from_bytes(cls, data):
+        # Check the prefix
+        magic, version, header_length = PREFIX.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a model artifact")
+        if version != VERSION:
+            raise ValueError(f"Unsupported model artifact version {version}")
+
+        # Parse the header
+        offset = PREFIX.size + header_length
+        header = json.loads(data[PREFIX.size : offset])
+
+        # Read the arrays without copying
+        params = np.frombuffer(data, np.float64, header["n_params"], offset)
+        offset += params.nbytes
+        history = np.frombuffer(data, np.float64, header["lags"], offset)
+
+        # Return the artifact
+        start = pd.Timestamp(header["start"])
+        if header["tz"] is not None:
+            start = start.tz_localize(header["tz"])
+        return cls(params, history, start, header["trend"], header["meta"])
+
+    # Function to store the artifact atomically
+    def save(self, path):
+        # Write to a temporary file and swap it in
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(self.to_bytes())
+        os.replace(tmp_path, path)
+
+    # Function to load an artifact
+    @classmethod
+    def load(cls, path):
+        # Return the artifact
+        return cls.from_bytes(Path(path).read_bytes())
+
+    # Function to forecast every day from the first forecast day to a date
+    def forecast(self, end):
+        # Build the daily index of the forecast
+        index = pd.date_range(self.start, end, freq="D")
+
+        # Split the constant from the lag coefficients
+        const = self.params[0] if self.trend == "c" else 0.0
+        coefs = self.params[1:] if self.trend == "c" else self.params
+
+        # Build the filter state holding the lagged terms of the stored observations
+        zi = np.correlate(coefs, self.history[::-1], "full")[len(coefs) - 1 :]
+
+        # Run the recursion as a filter started from that state
+        a = np.concatenate([[1.0], -coefs])
+        values, _ = lfilter([1.0], a, np.full(len(index), const), zi=zi)
+
+        # Return the forecast
+        return pd.Series(values, index=index)
+
+
+# Function to build the artifact name of a model fitted on a series
+def artifact_name(stock_ticker, series, lags):
+    # Fingerprint the values so revised data does not reuse a stale fit
+    values = np.ascontiguousarray(series.to_numpy(dtype=np.float64))
+    checksum = zlib.crc32(values.tobytes())
+
+    # Return the name with the ticker, the lags and the training window
+    return (
+        f"{stock_ticker}-ar{lags}-{series.index[0]:%Y%m%d}-"
+        f"{series.index[-1]:%Y%m%d}-{checksum:08x}.ar"
+    )
+
+
+# Function to load a stored artifact
+def load_artifact(name):
+    # Try to load the artifact
+    try:
+        return ARArtifact.load(MODEL_DIR / name)
+
+    # If the artifact is missing or unreadable
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+
+# Function to store an artifact and drop the older fits of the same stock
+def store_artifact(name, artifact):
+    # Try to store the artifact
+    try:
+        artifact.save(MODEL_DIR / name)
+
+        # Remove the artifacts of the previous training windows
+        prefix = name.rsplit("-", 3)[0]
+        for path in MODEL_DIR.glob(f"{prefix}-*.ar"):
+            if path.name != name:
+                path.unlink(missing_ok=True)
+
+    # If the folder is not writable the model is refit next time
+    except OSError:
+        pass
+
+
+# Function to fit one linear model per horizon against a shared lag matrix
+def fit_direct(series, lags, horizon):
+    # Build the lag matrix with the newest observation first in every row
+    values = series.to_numpy(dtype=np.float64)
+    windows = sliding_window_view(values, lags)[:, ::-1]
+
+    # Build the targets of every horizon for the rows with a complete future
+    targets = sliding_window_view(values[lags:], horizon)
+    if len(targets) <= lags + 1:
+        raise ValueError("Not enough observations for the direct forecast")
+
+    # Add the constant to the shared design
+    design = np.column_stack([np.ones(len(targets)), windows[: len(targets)]])
+
+    # Return the coefficients of every horizon from a single factorization
+    q, r = qr(design, mode="economic")
+    return solve_triangular(r, q.T @ targets)
+
+
+# Function to forecast every horizon from the observations before a date
+def forecast_direct(coefs, series, start):
+    # Build the regressors from the observations before the first forecast day
+    lags = len(coefs) - 1
+    past = series[series.index < start].to_numpy(dtype=np.float64)[-lags:][::-1]
+
+    # Return every horizon from one matrix vector product
+    return pd.Series(
+        np.concatenate([[1.0], past]) @ coefs,
+        index=pd.date_range(start, periods=coefs.shape[1], freq="D"),
+    )
+
+
+# Function to forecast the test data and the future with the direct strategy
+def direct_forecast(train_df, test_df, days=90, lags=DIRECT_LAGS):
+    # Fit one model per day from the start of the test data to the last future day
+    try:
+        coefs = fit_direct(train_df["Close"], lags, len(test_df) + days)
+
+    # If the history is too short
+    except ValueError:
+        return None
+
+    # Return the forecast over the same days as the recursive forecast
+    return forecast_direct(coefs, train_df["Close"], test_df.index[0])
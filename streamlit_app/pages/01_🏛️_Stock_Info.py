@@ -4,12 +4,27 @@ import streamlit as st
 # Import helper functions
 from helper import *
 
+# Import the cache pre-warming
+from prewarm import ensure_started, record_access
+
+# Import the tracing helpers
+from tracing import export_metrics, run_spans, start_run
+
 # Configure the page
 st.set_page_config(
     page_title="Stock Info",
     page_icon="🏛️",
 )
 
+# Start collecting the stage timings of this run
+start_run()
+
+# Start pre-warming the caches of the popular stocks
+ensure_started()
+
+# Use the stable fragment api when available
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
 #####Sidebar Start#####
 
 # Add a sidebar
@@ -35,9 +50,27 @@ st.sidebar.text_input(
     label="Stock ticker code", placeholder=stock_ticker, disabled=True
 )
 
+# Add a toggle for the live quotes
+st.sidebar.markdown("### **Live quotes**")
+live = st.sidebar.checkbox("Stream the latest quote", value=False)
+refresh = st.sidebar.select_slider(
+    "Refresh every (seconds)", options=[5, 10, 30, 60], value=10, disabled=not live
+)
+
+# Add a toggle for the timing breakdown
+st.sidebar.markdown("### **Diagnostics**")
+show_timings = st.sidebar.checkbox("Show timing breakdown", value=False)
+
 #####Sidebar End#####
 
 
+# Count the info visit once per session for the cache pre-warming
+access = (stock_ticker, "", "")
+if st.session_state.get("last_access") != access:
+    record_access(stock_ticker)
+    st.session_state["last_access"] = access
+
+
 # Fetch the info of the stock
 try:
     stock_data_info = fetch_stock_info(stock_ticker)
@@ -57,6 +90,47 @@ st.markdown("##### **Enhancing Your Stock Market Insights**")
 #####Title End#####
 
 
+#####Live Quote#####
+
+
+# Function to render the latest quote
+@fragment(run_every=refresh)
+def render_live_quote():
+    # Fetch the bars of the latest session only
+    latest = fetch_latest_bars(stock_ticker, "1m")
+
+    # Skip the quote if there are no bars
+    if latest.empty:
+        st.markdown("### **No live quote available for the selected stock**")
+        return
+
+    # Fetch the last price and the previous close
+    last_price = float(latest["Close"].iloc[-1])
+    previous_close = stock_data_info["Market Data"]["previousClose"]
+
+    # Show the quote
+    st.metric(
+        label=f"Live Price ({latest.index[-1]:%H:%M})",
+        value=f"{last_price:,.2f}",
+        delta=(
+            f"{last_price - previous_close:,.2f}"
+            if isinstance(previous_close, (int, float))
+            else None
+        ),
+    )
+
+
+# Render the latest quote when streaming
+if live:
+    # Add a heading
+    st.markdown("## **Live Quote**")
+
+    # Render the quote
+    render_live_quote()
+
+#####Live Quote End#####
+
+
 #####Basic Information#####
 
 # Add a heading
@@ -570,3 +644,16 @@ col2.dataframe(
     hide_index=True,
     width=500,
 )
+
+
+#####Timing Breakdown#####
+
+# Export the stage timings
+export_metrics()
+
+# Show the timing breakdown of this run
+if show_timings:
+    st.sidebar.markdown("### **Timing breakdown**")
+    st.sidebar.dataframe(pd.DataFrame(run_spans()), hide_index=True)
+
+#####Timing Breakdown End#####
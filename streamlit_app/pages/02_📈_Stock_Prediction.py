@@ -1,16 +1,44 @@
 # Imports
-import plotly.graph_objects as go
 import streamlit as st
 
+# Import chart builders
+from charts import build_history_chart, build_prediction_chart
+
 # Import helper functions
 from helper import *
 
+# Import the forecast ledger
+from ledger import (
+    AUTOREG_CONFIG,
+    DIRECT_CONFIG,
+    safe_fetch_accuracy,
+    safe_record_prediction,
+)
+
+# Import the direct multi-horizon forecast
+from models import direct_forecast
+
+# Import the cache pre-warming
+from prewarm import ensure_started, record_access
+
+# Import the tracing helpers
+from tracing import export_metrics, run_spans, span, start_run
+
 # Configure the page
 st.set_page_config(
     page_title="Stock Price Prediction",
     page_icon="📈",
 )
 
+# Start collecting the stage timings of this run
+start_run()
+
+# Start pre-warming the caches of the popular stocks
+ensure_started()
+
+# Use the stable fragment api when available
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
 
 #####Sidebar Start#####
 
@@ -48,9 +76,31 @@ period = st.sidebar.selectbox("Choose a period", list(periods.keys()))
 st.sidebar.markdown("### **Select interval**")
 interval = st.sidebar.selectbox("Choose an interval", periods[period])
 
+# Add a toggle for the live quotes
+st.sidebar.markdown("### **Live quotes**")
+live = st.sidebar.checkbox("Stream the latest bars", value=False)
+refresh = st.sidebar.select_slider(
+    "Refresh every (seconds)", options=[5, 10, 30, 60], value=10, disabled=not live
+)
+
+# Add a toggle for the direct forecast
+st.sidebar.markdown("### **Forecast mode**")
+show_direct = st.sidebar.checkbox("Compare with the direct forecast", value=False)
+
+# Add a toggle for the timing breakdown
+st.sidebar.markdown("### **Diagnostics**")
+show_timings = st.sidebar.checkbox("Show timing breakdown", value=False)
+
 #####Sidebar End#####
 
 
+# Count the selection once per session for the cache pre-warming
+access = (stock_ticker, period, interval)
+if st.session_state.get("last_access") != access:
+    record_access(stock_ticker, period, interval)
+    st.session_state["last_access"] = access
+
+
 #####Title#####
 
 # Add title to the app
@@ -71,24 +121,50 @@ stock_data = fetch_stock_history(stock_ticker, period, interval)
 # Add a title to the historical data graph
 st.markdown("## **Historical Data**")
 
-# Create a plot for the historical data
-fig = go.Figure(
-    data=[
-        go.Candlestick(
-            x=stock_data.index,
-            open=stock_data["Open"],
-            high=stock_data["High"],
-            low=stock_data["Low"],
-            close=stock_data["Close"],
-        )
-    ]
-)
+# Start the live bars of this session from the fetched history, replacing the bars
+# of the previous selection so the session holds a single history
+st.session_state["live_history"] = stock_data
+
+# Mark the forecast as current if it was generated after the close
+now = pd.Timestamp.now(tz="Asia/Kolkata")
+if now.time() >= MARKET_CLOSE:
+    st.session_state["forecast_session"] = now.date()
+
 
-# Customize the historical data graph
-fig.update_layout(xaxis_rangeslider_visible=False)
+# Function to render the historical data graph with the latest bars
+@fragment(run_every=refresh if live else None)
+def render_history():
+    # Fetch the bars merged on the previous refresh
+    history = st.session_state["live_history"]
 
-# Use the native streamlit theme.
-st.plotly_chart(fig, use_container_width=True)
+    # Apply the bars of the latest session only
+    if live:
+        latest = fetch_latest_bars(stock_ticker, interval)
+        history = merge_latest_bars(history, latest, interval)
+        st.session_state["live_history"] = history
+
+    # Build the historical data graph
+    with span("plot_history", ticker=stock_ticker, period=period, interval=interval):
+        fig = build_history_chart(history)
+
+    # Use the native streamlit theme.
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Rerun the whole page once the daily bar has closed to refresh the forecast
+    now = pd.Timestamp.now(tz="Asia/Kolkata")
+    if (
+        live
+        and not latest.empty
+        and latest.index[-1].date() == now.date()
+        and now.time() >= MARKET_CLOSE
+        and st.session_state.get("forecast_session") != now.date()
+    ):
+        st.session_state["forecast_session"] = now.date()
+        st.rerun()
+
+
+# Render the historical data graph
+render_history()
 
 #####Historical Data Graph End#####
 
@@ -103,46 +179,33 @@ if train_df is not None and (forecast >= 0).all() and (predictions >= 0).all():
     # Add a title to the stock prediction graph
     st.markdown("## **Stock Prediction**")
 
-    # Create a plot for the stock prediction
-    fig = go.Figure(
-        data=[
-            go.Scatter(
-                x=train_df.index,
-                y=train_df["Close"],
-                name="Train",
-                mode="lines",
-                line=dict(color="blue"),
-            ),
-            go.Scatter(
-                x=test_df.index,
-                y=test_df["Close"],
-                name="Test",
-                mode="lines",
-                line=dict(color="orange"),
-            ),
-            go.Scatter(
-                x=forecast.index,
-                y=forecast,
-                name="Forecast",
-                mode="lines",
-                line=dict(color="red"),
-            ),
-            go.Scatter(
-                x=test_df.index,
-                y=predictions,
-                name="Test Predictions",
-                mode="lines",
-                line=dict(color="green"),
-            ),
-        ]
-    )
-
-    # Customize the stock prediction graph
-    fig.update_layout(xaxis_rangeslider_visible=False)
+    # Forecast every horizon directly from the same training data
+    with span("direct", ticker=stock_ticker, period="2y", interval="1d"):
+        direct = direct_forecast(train_df, test_df)
+
+    # Build the stock prediction graph
+    with span("plot_prediction", ticker=stock_ticker, period="2y", interval="1d"):
+        fig = build_prediction_chart(
+            train_df,
+            test_df,
+            forecast,
+            predictions,
+            direct if show_direct else None,
+        )
 
     # Use the native streamlit theme.
     st.plotly_chart(fig, use_container_width=True)
 
+    # Record the forecast and score the earlier ones against the realized closes
+    with span("ledger", ticker=stock_ticker, period="2y", interval="1d"):
+        forecasts = [(AUTOREG_CONFIG, forecast)]
+        if direct is not None:
+            forecasts.append((DIRECT_CONFIG, direct))
+
+        # Score against the daily closes of the sessions only
+        session_closes = fetch_stock_history(stock_ticker, "2y", "1d")["Close"]
+        safe_record_prediction(stock_ticker, session_closes, test_df, forecasts)
+
 # If the data is None
 else:
     # Add a title to the stock prediction graph
@@ -152,3 +215,41 @@ else:
     st.markdown("### **No data available for the selected stock**")
 
 #####Stock Prediction Graph End#####
+
+
+#####Forecast Accuracy#####
+
+# Fetch the running accuracy of the forecasts of this stock and of every stock
+stock_accuracy = safe_fetch_accuracy(stock_ticker)
+overall_accuracy = safe_fetch_accuracy()
+
+# Check if any forecast has been scored
+if not overall_accuracy.empty:
+    # Add a title to the forecast accuracy
+    st.markdown("## **Forecast Accuracy**")
+
+    # Show the accuracy of the forecasts of this stock
+    st.markdown(f"### **{stock}**")
+    if stock_accuracy.empty:
+        st.markdown("No forecast of this stock has been scored yet")
+    else:
+        st.dataframe(stock_accuracy, hide_index=True, use_container_width=True)
+
+    # Show the accuracy of the forecasts of every stock
+    st.markdown("### **All stocks**")
+    st.dataframe(overall_accuracy, hide_index=True, use_container_width=True)
+
+#####Forecast Accuracy End#####
+
+
+#####Timing Breakdown#####
+
+# Export the stage timings
+export_metrics()
+
+# Show the timing breakdown of this run
+if show_timings:
+    st.sidebar.markdown("### **Timing breakdown**")
+    st.sidebar.dataframe(pd.DataFrame(run_spans()), hide_index=True)
+
+#####Timing Breakdown End#####
@@ -0,0 +1,178 @@
+# Imports
+import streamlit as st
+
+# Import chart builders
+from charts import build_composite_chart
+
+# Import helper functions
+from helper import *
+
+# Import the price panel and the composites
+from panel import open_panel
+from sectors import (
+    LEVELS,
+    WEIGHTINGS,
+    fetch_composites,
+    fetch_stock_group,
+    rebase,
+    summarize_composites,
+)
+
+# Import the cache pre-warming
+from prewarm import ensure_started
+
+# Import the tracing helpers
+from tracing import export_metrics, run_spans, span, start_run
+
+# Configure the page
+st.set_page_config(
+    page_title="Sector Indices",
+    page_icon="🏭",
+)
+
+# Start collecting the stage timings of this run
+start_run()
+
+# Start pre-warming the caches of the popular stocks
+ensure_started()
+
+
+#####Sidebar Start#####
+
+# Add a sidebar
+st.sidebar.markdown("## **User Input Features**")
+
+# Fetch and store the stock data
+stock_dict = fetch_stocks()
+
+# Add a dropdown for selecting the stock
+st.sidebar.markdown("### **Select stock**")
+stock = st.sidebar.selectbox("Choose a stock", list(stock_dict.keys()))
+
+# Add a selector for stock exchange
+st.sidebar.markdown("### **Select stock exchange**")
+stock_exchange = st.sidebar.radio("Choose a stock exchange", ("BSE", "NSE"), index=0)
+
+# Build the stock ticker
+stock_ticker = f"{stock_dict[stock]}.{'BO' if stock_exchange == 'BSE' else 'NS'}"
+
+# Add a disabled input for stock ticker
+st.sidebar.markdown("### **Stock ticker**")
+st.sidebar.text_input(
+    label="Stock ticker code", placeholder=stock_ticker, disabled=True
+)
+
+# Add a selector for the classification level
+st.sidebar.markdown("### **Select classification**")
+level = st.sidebar.selectbox("Choose a classification level", list(LEVELS.keys()))
+
+# Add a selector for the weighting
+st.sidebar.markdown("### **Select weighting**")
+weighting = st.sidebar.radio("Choose a weighting", WEIGHTINGS, index=0)
+
+# Add a toggle for the timing breakdown
+st.sidebar.markdown("### **Diagnostics**")
+show_timings = st.sidebar.checkbox("Show timing breakdown", value=False)
+
+#####Sidebar End#####
+
+
+#####Title#####
+
+# Add title to the app
+st.markdown("# **Sector Indices**")
+
+# Add a subtitle to the app
+st.markdown("##### **Benchmark Stocks against their Sector and Industry Peers**")
+
+#####Title End#####
+
+
+# Open the price panel
+panel = open_panel()
+
+# Stop if the price panel has not been built
+if panel is None:
+    st.warning(
+        "The price panel has not been built yet. "
+        "Run `python streamlit_app/panel.py build` to create it."
+    )
+    st.stop()
+
+# Fetch the composites of the level
+with span("composites", level=level, weighting=weighting):
+    composites = fetch_composites(level, weighting)
+
+# Stop if the cap weighted composites are unavailable
+if composites is None:
+    st.warning(
+        "Cap weighted composites need the shares outstanding of the universe. "
+        "Run `python streamlit_app/sectors.py shares` to fetch them."
+    )
+    st.stop()
+
+
+#####Stock vs Composite Graph#####
+
+# Add a title to the composite graph
+st.markdown("## **Stock vs Composite**")
+
+# Fetch the group of the stock
+group = fetch_stock_group(stock_dict[stock], level)
+
+# Check if the stock is classified
+if group is not None and group in composites.columns:
+    # Fetch the stock close from the panel or from yahoo finance
+    if stock_ticker in panel.ticker_index:
+        stock_close = panel.frame("Close", [stock_ticker])[stock_ticker]
+    else:
+        stock_close = fetch_stock_history(stock_ticker, "5y", "1d")["Close"]
+        stock_close.index = stock_close.index.tz_localize(None).normalize()
+
+    # Rebase the stock and its composite
+    stock_close, composite = rebase(stock_close, composites[group])
+
+    # Check if the stock and its composite share any dates
+    if stock_close is not None:
+        # Build the composite graph
+        with span("plot_composite", ticker=stock_ticker, level=level):
+            fig = build_composite_chart(
+                stock_close, composite, stock_ticker, f"{group} ({weighting})"
+            )
+
+        # Use the native streamlit theme.
+        st.plotly_chart(fig, use_container_width=True)
+
+    # If there is no common data
+    else:
+        st.markdown("### **No data available for the selected stock**")
+
+# If the stock is not classified
+else:
+    st.markdown(f"### **No {level.lower()} classification for the selected stock**")
+
+#####Stock vs Composite Graph End#####
+
+
+#####Composite Performance#####
+
+# Add a heading
+st.markdown(f"## **{level} Performance (%)**")
+
+# Show the trailing returns of every composite
+st.dataframe(summarize_composites(composites), use_container_width=True)
+
+#####Composite Performance End#####
+
+
+#####Timing Breakdown#####
+
+# Export the stage timings
+export_metrics()
+
+# Show the timing breakdown of this run
+if show_timings:
+    st.sidebar.markdown("### **Timing breakdown**")
+    st.sidebar.dataframe(pd.DataFrame(run_spans()), hide_index=True)
+
+#####Timing Breakdown End#####
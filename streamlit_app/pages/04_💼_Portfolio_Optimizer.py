@@ -0,0 +1,201 @@
+# Imports
+import datetime as dt
+
+# Import numpy
+import numpy as np
+
+# Import streamlit
+import streamlit as st
+
+# Import chart builders
+from charts import build_frontier_chart
+
+# Import helper functions
+from helper import *
+
+# Import the portfolio optimizer
+from portfolio import (
+    LOOKBACK_DAYS,
+    efficient_frontier,
+    estimate_moments,
+    summarize_portfolios,
+)
+
+# Import the cache pre-warming
+from prewarm import ensure_started
+
+# Import the tracing helpers
+from tracing import export_metrics, run_spans, span, start_run
+
+# Configure the page
+st.set_page_config(
+    page_title="Portfolio Optimizer",
+    page_icon="💼",
+)
+
+# Start collecting the stage timings of this run
+start_run()
+
+# Start pre-warming the caches of the popular stocks
+ensure_started()
+
+
+#####Sidebar Start#####
+
+# Add a sidebar
+st.sidebar.markdown("## **User Input Features**")
+
+# Fetch and store the stock data
+stock_dict = fetch_stocks()
+
+# Add a multiselect for the holdings
+st.sidebar.markdown("### **Select holdings**")
+stocks = st.sidebar.multiselect(
+    "Choose the stocks", list(stock_dict.keys()), default=list(stock_dict.keys())[:5]
+)
+
+# Add a selector for stock exchange
+st.sidebar.markdown("### **Select stock exchange**")
+stock_exchange = st.sidebar.radio("Choose a stock exchange", ("BSE", "NSE"), index=0)
+
+# Build the stock tickers
+stock_tickers = tuple(
+    f"{stock_dict[stock]}.{'BO' if stock_exchange == 'BSE' else 'NS'}"
+    for stock in stocks
+)
+
+# Add a selector for the lookback period
+st.sidebar.markdown("### **Select lookback period**")
+period = st.sidebar.selectbox("Choose a period", list(LOOKBACK_DAYS.keys()), index=1)
+
+# Add an input for the risk free rate
+st.sidebar.markdown("### **Risk free rate**")
+risk_free_pct = st.sidebar.number_input(
+    "Annual risk free rate (%)", min_value=0.0, max_value=20.0, value=7.0, step=0.25
+)
+
+# Convert the risk free rate to a fraction
+risk_free = risk_free_pct / 100
+
+# Add a slider for the number of frontier points
+st.sidebar.markdown("### **Frontier points**")
+n_points = st.sidebar.slider("Number of points", 10, 500, 100)
+
+# Add a toggle for the timing breakdown
+st.sidebar.markdown("### **Diagnostics**")
+show_timings = st.sidebar.checkbox("Show timing breakdown", value=False)
+
+#####Sidebar End#####
+
+
+#####Title#####
+
+# Add title to the app
+st.markdown("# **Portfolio Optimizer**")
+
+# Add a subtitle to the app
+st.markdown("##### **Balance Risk and Return across your Holdings**")
+
+#####Title End#####
+
+
+# Stop if the basket is too small
+if len(stock_tickers) < 2:
+    st.markdown("### **Select at least two stocks to optimize a portfolio**")
+    st.stop()
+
+# Estimate the moments of the basket once per day
+try:
+    with span("portfolio_moments", stocks=len(stock_tickers), period=period):
+        moments = estimate_moments(stock_tickers, period, dt.date.today())
+except Exception:
+    st.error("Error: Unable to fetch the stock data. Please try again later.")
+    st.stop()
+
+# Stop if too few stocks have enough history
+if len(moments["tickers"]) < 2:
+    st.markdown("### **Not enough price history for the selected stocks**")
+    st.stop()
+
+# Compute the frontier and the portfolios
+with span("portfolio_frontier", stocks=len(moments["tickers"]), points=n_points):
+    optimized = efficient_frontier(
+        moments["mean"], moments["cov"], risk_free=risk_free, n_points=n_points
+    )
+
+# Summarize the portfolios
+summary = summarize_portfolios(
+    optimized["portfolios"], moments["mean"], moments["cov"], risk_free=risk_free
+)
+
+
+#####Efficient Frontier Graph#####
+
+# Add a title to the frontier graph
+st.markdown("## **Efficient Frontier**")
+
+# Build the statistics of the single stocks
+assets = pd.DataFrame(
+    {"Return": moments["mean"], "Risk": np.sqrt(np.diag(moments["cov"]))},
+    index=moments["tickers"],
+)
+
+# Build the frontier graph
+with span("plot_frontier", stocks=len(moments["tickers"])):
+    fig = build_frontier_chart(optimized["frontier"], summary, assets)
+
+# Use the native streamlit theme.
+st.plotly_chart(fig, use_container_width=True)
+
+# Describe the estimation
+st.caption(
+    f"Ledoit-Wolf shrinkage {moments['shrinkage']:.2f} over "
+    f"{moments['observations']} daily returns. The frontier allows short positions."
+)
+
+# Warn if the maximum sharpe portfolio does not exist
+if optimized["portfolios"]["Max Sharpe"] is None:
+    st.warning("The risk free rate exceeds the minimum variance return.")
+
+#####Efficient Frontier Graph End#####
+
+
+#####Portfolios#####
+
+# Add a heading
+st.markdown("## **Portfolios**")
+
+# Show the statistics of the portfolios
+st.dataframe(
+    summary.style.format({"Return": "{:.2%}", "Risk": "{:.2%}", "Sharpe": "{:.2f}"}),
+    use_container_width=True,
+)
+
+# Add a heading
+st.markdown("## **Weights**")
+
+# Show the weights of the portfolios
+weights = pd.DataFrame(
+    {
+        name: weights
+        for name, weights in optimized["portfolios"].items()
+        if weights is not None
+    },
+    index=moments["tickers"],
+)
+st.dataframe(weights.style.format("{:.2%}"), use_container_width=True)
+
+#####Portfolios End#####
+
+
+#####Timing Breakdown#####
+
+# Export the stage timings
+export_metrics()
+
+# Show the timing breakdown of this run
+if show_timings:
+    st.sidebar.markdown("### **Timing breakdown**")
+    st.sidebar.dataframe(pd.DataFrame(run_spans()), hide_index=True)
+
+#####Timing Breakdown End#####
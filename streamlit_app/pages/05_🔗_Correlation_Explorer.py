@@ -0,0 +1,193 @@
+# Imports
+import streamlit as st
+
+# Import chart builders
+from charts import (
+    build_correlation_heatmap,
+    build_normalized_chart,
+    build_pair_correlation_chart,
+)
+
+# Import the correlation helpers
+from correlation import MAX_STOCKS, normalize_closes, rolling_correlation
+
+# Import helper functions
+from helper import *
+
+# Import the basket helpers
+from portfolio import LOOKBACK_DAYS, fetch_basket_closes
+
+# Import the cache pre-warming
+from prewarm import ensure_started
+
+# Import the tracing helpers
+from tracing import export_metrics, run_spans, span, start_run
+
+# Configure the page
+st.set_page_config(
+    page_title="Correlation Explorer",
+    page_icon="🔗",
+)
+
+# Start collecting the stage timings of this run
+start_run()
+
+# Start pre-warming the caches of the popular stocks
+ensure_started()
+
+
+#####Sidebar Start#####
+
+# Add a sidebar
+st.sidebar.markdown("## **User Input Features**")
+
+# Fetch and store the stock data
+stock_dict = fetch_stocks()
+
+# Add a multiselect for the stocks
+st.sidebar.markdown("### **Select stocks**")
+stocks = st.sidebar.multiselect(
+    "Choose the stocks",
+    list(stock_dict.keys()),
+    default=list(stock_dict.keys())[:5],
+    max_selections=MAX_STOCKS,
+)
+
+# Add a selector for stock exchange
+st.sidebar.markdown("### **Select stock exchange**")
+stock_exchange = st.sidebar.radio("Choose a stock exchange", ("BSE", "NSE"), index=0)
+
+# Build the stock tickers
+stock_tickers = [
+    f"{stock_dict[stock]}.{'BO' if stock_exchange == 'BSE' else 'NS'}"
+    for stock in stocks
+]
+
+# Add a selector for the period
+st.sidebar.markdown("### **Select period**")
+period = st.sidebar.selectbox("Choose a period", list(LOOKBACK_DAYS.keys()), index=1)
+
+# Add a slider for the rolling window
+st.sidebar.markdown("### **Select rolling window**")
+window = st.sidebar.slider("Window in trading days", 20, 250, 60)
+
+# Add a toggle for the timing breakdown
+st.sidebar.markdown("### **Diagnostics**")
+show_timings = st.sidebar.checkbox("Show timing breakdown", value=False)
+
+#####Sidebar End#####
+
+
+#####Title#####
+
+# Add title to the app
+st.markdown("# **Correlation Explorer**")
+
+# Add a subtitle to the app
+st.markdown("##### **Discover how your Stocks Move Together**")
+
+#####Title End#####
+
+
+# Stop if there are too few stocks
+if len(stock_tickers) < 2:
+    st.markdown("### **Select at least two stocks to compare**")
+    st.stop()
+
+# Fetch the aligned closes
+try:
+    with span("basket_closes", stocks=len(stock_tickers), period=period):
+        closes = fetch_basket_closes(stock_tickers, period).dropna(axis=1, how="all")
+except Exception:
+    st.error("Error: Unable to fetch the stock data. Please try again later.")
+    st.stop()
+
+# Stop if the history is shorter than the window
+if len(closes) <= window or len(closes.columns) < 2:
+    st.markdown("### **Not enough price history for the selected window**")
+    st.stop()
+
+
+#####Normalized Price Graph#####
+
+# Add a title to the normalized price graph
+st.markdown("## **Normalized Prices**")
+
+# Build the normalized price graph
+with span("plot_normalized", stocks=len(closes.columns), period=period):
+    fig = build_normalized_chart(normalize_closes(closes))
+
+# Use the native streamlit theme.
+st.plotly_chart(fig, use_container_width=True)
+
+#####Normalized Price Graph End#####
+
+
+# Compute the rolling correlations of every pair at once
+returns = closes.pct_change(fill_method=None).iloc[1:]
+with span("rolling_correlation", stocks=len(closes.columns), window=window):
+    correlations = rolling_correlation(returns.to_numpy(), window)
+window_ends = returns.index[window - 1 :]
+labels = list(closes.columns)
+
+
+#####Correlation Heatmap#####
+
+# Add a title to the heatmap
+st.markdown("## **Rolling Correlation Heatmap**")
+
+# Add a slider for the window end date
+end_date = st.select_slider(
+    "Window ending on",
+    options=list(window_ends.date),
+    value=window_ends[-1].date(),
+)
+
+# Build the heatmap
+with span("plot_heatmap", stocks=len(labels), window=window):
+    fig = build_correlation_heatmap(
+        correlations[list(window_ends.date).index(end_date)], labels
+    )
+
+# Use the native streamlit theme.
+st.plotly_chart(fig, use_container_width=True)
+
+#####Correlation Heatmap End#####
+
+
+#####Pairs Explorer#####
+
+# Add a title to the pairs explorer
+st.markdown("## **Pairs Explorer**")
+
+# Create 2 columns
+col1, col2 = st.columns(2)
+
+# Add the selectors for the pair
+first = col1.selectbox("First stock", labels, index=0)
+second = col2.selectbox("Second stock", labels, index=1)
+
+# Build the pair graph
+i, j = labels.index(first), labels.index(second)
+with span("plot_pair", window=window):
+    fig = build_pair_correlation_chart(
+        window_ends, correlations[:, i, j], f"{first} / {second}"
+    )
+
+# Use the native streamlit theme.
+st.plotly_chart(fig, use_container_width=True)
+
+#####Pairs Explorer End#####
+
+
+#####Timing Breakdown#####
+
+# Export the stage timings
+export_metrics()
+
+# Show the timing breakdown of this run
+if show_timings:
+    st.sidebar.markdown("### **Timing breakdown**")
+    st.sidebar.dataframe(pd.DataFrame(run_spans()), hide_index=True)
+
+#####Timing Breakdown End#####
@@ -0,0 +1,200 @@
+# Imports
+import streamlit as st
+
+# Import chart builders
+from charts import build_var_chart, build_volatility_chart
+
+# Import helper functions
+from helper import *
+
+# Import the price panel and the classification
+from panel import open_panel
+from sectors import LEVELS, fetch_panel_groups, fetch_stock_group
+
+# Import the risk models
+from risk import RISK_DAYS, VAR_LEVEL, fetch_universe_risk, forecast_risk
+
+# Import the cache pre-warming
+from prewarm import ensure_started
+
+# Import the tracing helpers
+from tracing import export_metrics, run_spans, span, start_run
+
+# Configure the page
+st.set_page_config(
+    page_title="Risk Panel",
+    page_icon="⚠️",
+)
+
+# Start collecting the stage timings of this run
+start_run()
+
+# Start pre-warming the caches of the popular stocks
+ensure_started()
+
+
+#####Sidebar Start#####
+
+# Add a sidebar
+st.sidebar.markdown("## **User Input Features**")
+
+# Fetch and store the stock data
+stock_dict = fetch_stocks()
+
+# Add a dropdown for selecting the stock
+st.sidebar.markdown("### **Select stock**")
+stock = st.sidebar.selectbox("Choose a stock", list(stock_dict.keys()))
+
+# Add a selector for stock exchange
+st.sidebar.markdown("### **Select stock exchange**")
+stock_exchange = st.sidebar.radio("Choose a stock exchange", ("BSE", "NSE"), index=0)
+
+# Build the stock ticker
+stock_ticker = f"{stock_dict[stock]}.{'BO' if stock_exchange == 'BSE' else 'NS'}"
+
+# Add a disabled input for stock ticker
+st.sidebar.markdown("### **Stock ticker**")
+st.sidebar.text_input(
+    label="Stock ticker code", placeholder=stock_ticker, disabled=True
+)
+
+# Add a selector for the classification level
+st.sidebar.markdown("### **Select classification**")
+level = st.sidebar.selectbox("Choose a classification level", list(LEVELS.keys()))
+
+# Add a slider for the number of riskiest names
+st.sidebar.markdown("### **Riskiest names**")
+n_names = st.sidebar.slider("Number of names", 5, 50, 10)
+
+# Add a toggle for the timing breakdown
+st.sidebar.markdown("### **Diagnostics**")
+show_timings = st.sidebar.checkbox("Show timing breakdown", value=False)
+
+#####Sidebar End#####
+
+
+#####Title#####
+
+# Add title to the app
+st.markdown("# **Risk Panel**")
+
+# Add a subtitle to the app
+st.markdown("##### **Forecast Volatility and Value at Risk with EWMA and GARCH**")
+
+#####Title End#####
+
+
+#####Volatility Forecast#####
+
+# Add a title to the volatility forecast
+st.markdown("## **Volatility Forecast**")
+
+# Fit the volatility models and forecast the risk of the stock
+with span("risk", ticker=stock_ticker, period="2y", interval="1d"):
+    history, forecast, summary = forecast_risk(stock_ticker)
+
+# Check if the data is not None
+if history is not None:
+    # Build the volatility graph of the last year
+    with span("plot_volatility", ticker=stock_ticker, period="2y", interval="1d"):
+        fig = build_volatility_chart(history.iloc[-252:], forecast)
+
+    # Use the native streamlit theme.
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Add a title to the value at risk graph
+    st.markdown(f"## **{RISK_DAYS}-day Value at Risk**")
+
+    # Build the value at risk graph
+    with span("plot_var", ticker=stock_ticker, period="2y", interval="1d"):
+        fig = build_var_chart(forecast, VAR_LEVEL)
+
+    # Use the native streamlit theme.
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Show the parameters and the forecasts of both models
+    st.dataframe(summary.round(4), use_container_width=True)
+
+# If the data is None
+else:
+    # Add a message to the volatility forecast
+    st.markdown("### **Not enough data available for the selected stock**")
+
+#####Volatility Forecast End#####
+
+
+#####Riskiest Names#####
+
+# Fetch the group of the stock
+group = fetch_stock_group(stock_dict[stock], level)
+
+# Add a title to the riskiest names
+st.markdown(f"## **Riskiest Names in {group or level}**")
+
+# Open the price panel
+panel = open_panel()
+
+# Check if the price panel has been built
+if panel is None:
+    st.warning(
+        "The price panel has not been built yet. "
+        "Run `python streamlit_app/panel.py build` to create it."
+    )
+
+# Check if the stock is classified
+elif group is None:
+    st.markdown(f"### **No {level.lower()} classification for the selected stock**")
+
+# Rank the peers of the stock
+else:
+    # Fetch the stored risk scores of the universe
+    with span("risk_universe", level=level):
+        scores, current = fetch_universe_risk(panel)
+
+    # Check if the universe has been scored
+    if scores is None:
+        st.warning(
+            "The risk scores have not been computed yet. "
+            "Run `python streamlit_app/risk.py score` to compute them."
+        )
+
+    # Rank the peers of the stock
+    else:
+        # Warn that the scores predate the last panel update
+        if not current:
+            st.warning(
+                "The risk scores are older than the price panel. "
+                "Run `python streamlit_app/risk.py score` to refresh them."
+            )
+
+        # Keep the scored stocks of the same group
+        peers = scores[fetch_panel_groups(panel, level) == group].dropna()
+
+        # Add the names of the stocks
+        names = {security_id: name for name, security_id in stock_dict.items()}
+        peers.insert(
+            0, "Name", [names.get(t.rsplit(".", 1)[0], t) for t in peers.index]
+        )
+
+        # Show the stocks with the largest value at risk
+        st.dataframe(
+            peers.sort_values(f"{RISK_DAYS}-day VaR (%)", ascending=False)
+            .head(n_names)
+            .round(2),
+            use_container_width=True,
+        )
+
+#####Riskiest Names End#####
+
+
+#####Timing Breakdown#####
+
+# Export the stage timings
+export_metrics()
+
+# Show the timing breakdown of this run
+if show_timings:
+    st.sidebar.markdown("### **Timing breakdown**")
+    st.sidebar.dataframe(pd.DataFrame(run_spans()), hide_index=True)
+
+#####Timing Breakdown End#####
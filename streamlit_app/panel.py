@@ -0,0 +1,345 @@
+# Imports
+import argparse
+import json
+import os
+import threading
+from pathlib import Path
+
+# Import numpy
+import numpy as np
+
+# Import pandas
+import pandas as pd
+
+# Import yfinance
+import yfinance as yf
+
+# Import helper functions
+from helper import MARKET_CLOSE, fetch_stocks
+
+# Create the folder of the price panel
+PANEL_DIR = Path(os.environ.get("STOCKASTIC_PANEL_DIR", Path.cwd() / "data" / "panel"))
+
+# Create tuple for the fields stored in the panel
+FIELDS = ("Close", "Volume")
+
+# Create the number of tickers downloaded in one request
+BATCH_SIZE = 200
+
+
+# Create class for a date x ticker price panel backed by memory-mapped files
+class PricePanel:
+    # Initialize the panel
+    def __init__(self, path=PANEL_DIR):
+        # Store the folder
+        self.path = Path(path)
+
+        # Load the metadata and map the files
+        self._load()
+
+    # Function to load the metadata and map the files
+    def _load(self):
+        # Load the metadata
+        meta = json.loads((self.path / "meta.json").read_text())
+        self.tickers = meta["tickers"]
+        self.length = meta["length"]
+        self.capacity = meta["capacity"]
+        self.ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+        # Map the dates and the fields
+        self.dates = self._map("dates", "r", np.int64, (self.capacity,))
+        self.fields = {
+            field: self._map(field, "r", np.float32, self.shape) for field in FIELDS
+        }
+
+    # Function to fetch the shape of the mapped matrices
+    @property
+    def shape(self):
+        # Return the capacity of dates by the number of tickers
+        return (self.capacity, len(self.tickers))
+
+    # Function to fetch the file of a field at a capacity
+    def _file(self, name, capacity=None):
+        # Return the path with the capacity so a resize never reuses a file
+        return self.path / f"{name.lower()}.{capacity or self.capacity}.bin"
+
+    # Function to map a field
+    def _map(self, name, mode, dtype, shape, capacity=None):
+        # Map the file with every ticker stored contiguously over the dates
+        return np.memmap(
+            self._file(name, capacity), dtype=dtype, mode=mode, shape=shape, order="F"
+        )
+
+    # Function to create an empty panel
+    @classmethod
+    def create(cls, tickers, capacity=4096, path=PANEL_DIR):
+        # Create the folder
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        # Create the files filled with missing values
+        shape = (capacity, len(tickers))
+        dates = np.memmap(
+            path / f"dates.{capacity}.bin", dtype=np.int64, mode="w+", shape=(capacity,)
+        )
+        dates.flush()
+        for field in FIELDS:
+            values = np.memmap(
+                path / f"{field.lower()}.{capacity}.bin",
+                dtype=np.float32,
+                mode="w+",
+                shape=shape,
+                order="F",
+            )
+            values[:] = np.nan
+            values.flush()
+
+        # Write the metadata
+        write_meta(path, {"tickers": list(tickers), "length": 0, "capacity": capacity})
+
+        # Return the panel
+        return cls(path)
+
+    # Function to fetch the dates of the panel
+    @property
+    def index(self):
+        # Return the dates as a datetime index
+        return pd.DatetimeIndex(self.dates[: self.length].astype("datetime64[D]"))
+
+    # Function to fetch the last date of the panel
+    @property
+    def last_date(self):
+        # Return None for an empty panel
+        if self.length == 0:
+            return None
+
+        # Return the last date
+        return pd.Timestamp(self.dates[self.length - 1].astype("datetime64[D]"))
+
+    # Function to fetch the matrix of a field without copying
+    def values(self, field="Close", tickers=None):
+        # Fetch the rows with data
+        values = self.fields[field][: self.length]
+
+        # Return every ticker
+        if tickers is None:
+            return values
+
+        # Return the columns of the selected tickers
+        return values[:, [self.ticker_index[ticker] for ticker in tickers]]
+
+    # Function to fetch a field as a dataframe
+    def frame(self, field="Close", tickers=None):
+        # Return the dataframe over the mapped values
+        return pd.DataFrame(
+            self.values(field, tickers),
+            index=self.index,
+            columns=self.tickers if tickers is None else list(tickers),
+            copy=False,
+        )
+
+    # Function to append new dates to the panel
+    def append(self, frames):
+        # Keep only the dates after the last date of the panel
+        dates = frames["Close"].index
+        if self.length:
+            dates = dates[dates > self.last_date]
+        if len(dates) == 0:
+            return 0
+
+        # Grow the files if they are full
+        if self.length + len(dates) > self.capacity:
+            self._grow(max(self.capacity * 2, self.length + len(dates)))
+
+        # Write the new rows
+        rows = slice(self.length, self.length + len(dates))
+        dates_w = self._map("dates", "r+", np.int64, (self.capacity,))
+        dates_w[rows] = dates.values.astype("datetime64[D]").astype(np.int64)
+        dates_w.flush()
+        for field in FIELDS:
+            values = self._map(field, "r+", np.float32, self.shape)
+            values[rows] = (
+                frames[field]
+                .reindex(index=dates, columns=self.tickers)
+                .to_numpy(dtype=np.float32)
+            )
+            values.flush()
+
+        # Publish the new rows to the readers
+        self.length += len(dates)
+        self._write_meta()
+
+        # Reload the mappings
+        self._load()
+
+        # Return the number of appended dates
+        return len(dates)
+
+    # Function to move the data to larger files
+    def _grow(self, capacity):
+        # Copy the dates
+        dates = self._map("dates", "w+", np.int64, (capacity,), capacity)
+        dates[: self.length] = self.dates[: self.length]
+        dates.flush()
+
+        # Copy the fields
+        for field in FIELDS:
+            values = self._map(
+                field, "w+", np.float32, (capacity, len(self.tickers)), capacity
+            )
+            values[:] = np.nan
+            values[: self.length] = self.fields[field][: self.length]
+            values.flush()
+
+        # Switch the readers to the larger files
+        old_capacity, self.capacity = self.capacity, capacity
+        self._write_meta()
+
+        # Remove the old files
+        for name in ("dates", *FIELDS):
+            self._file(name, old_capacity).unlink(missing_ok=True)
+
+        # Reload the mappings
+        self._load()
+
+    # Function to write the metadata
+    def _write_meta(self):
+        # Write the metadata
+        write_meta(
+            self.path,
+            {"tickers": self.tickers, "length": self.length, "capacity": self.capacity},
+        )
+
+
+# Function to write the metadata of a panel atomically
+def write_meta(path, meta):
+    # Write to a temporary file and swap it in
+    tmp_path = path / f"meta.json.{os.getpid()}.tmp"
+    tmp_path.write_text(json.dumps(meta))
+    os.replace(tmp_path, path / "meta.json")
+
+
+# Create the storage for the panel opened by this process
+_panel = {"panel": None, "mtime": None}
+
+# Create the lock guarding the opened panel
+_panel_lock = threading.Lock()
+
+
+# Function to open the panel and reopen it after an update
+def open_panel(path=PANEL_DIR):
+    # Return None if the panel has not been built
+    meta_path = Path(path) / "meta.json"
+    if not meta_path.exists():
+        return None
+
+    # Reopen the panel if the metadata changed
+    with _panel_lock:
+        mtime = meta_path.stat().st_mtime_ns
+        if _panel["mtime"] != mtime:
+            _panel["panel"] = PricePanel(path)
+            _panel["mtime"] = mtime
+
+        # Return the panel
+        return _panel["panel"]
+
+
+# Function to fetch the tickers of the universe
+def fetch_universe(stock_exchange="BSE"):
+    # Build the tickers from the security ids
+    suffix = "BO" if stock_exchange == "BSE" else "NS"
+    return [f"{security_id}.{suffix}" for security_id in fetch_stocks().values()]
+
+
+# Function to download the daily bars of many tickers
+def download_fields(tickers, period):
+    # Create dictionary for the downloaded batches
+    batches = {field: [] for field in FIELDS}
+
+    # Download the tickers in batches
+    for start in range(0, len(tickers), BATCH_SIZE):
+        # Download the batch
+        data = yf.download(
+            tickers[start : start + BATCH_SIZE],
+            period=period,
+            interval="1d",
+            group_by="column",
+            auto_adjust=True,
+            threads=True,
+            progress=False,
+        )
+
+        # Keep the fields of the batch
+        for field in FIELDS:
+            batches[field].append(data[field])
+
+    # Combine the batches
+    frames = {field: pd.concat(batches[field], axis=1) for field in FIELDS}
+
+    # Index the bars by their trading date
+    for frame in frames.values():
+        frame.index = pd.DatetimeIndex(frame.index.date)
+
+    # Drop the bar of the current session until the market has closed
+    now = pd.Timestamp.now(tz="Asia/Kolkata")
+    if now.time() < MARKET_CLOSE:
+        today = pd.Timestamp(now.date())
+        frames = {field: frame[frame.index < today] for field, frame in frames.items()}
+
+    # Return the frames
+    return frames
+
+
+# Function to build the panel for the whole universe
+def build_panel(stock_exchange="BSE", period="5y", path=PANEL_DIR):
+    # Fetch the universe
+    tickers = fetch_universe(stock_exchange)
+
+    # Download the history
+    frames = download_fields(tickers, period)
+
+    # Create the panel with room for future dates
+    panel = PricePanel.create(tickers, len(frames["Close"]) + 512, path)
+
+    # Append the history
+    panel.append(frames)
+
+    # Return the panel
+    return panel
+
+
+# Function to append the dates missing from the panel
+def update_panel(period="5y", path=PANEL_DIR):
+    # Open the panel
+    panel = PricePanel(path)
+
+    # Pick the shortest period covering the missing dates, or the build period if
+    # the panel has no dates yet
+    if panel.last_date is not None:
+        gap = (pd.Timestamp.now().normalize() - panel.last_date).days
+        period = next(
+            (p for p, days in [("5d", 5), ("1mo", 28), ("3mo", 89)] if gap <= days),
+            "1y",
+        )
+
+    # Append the new dates
+    return panel.append(download_fields(panel.tickers, period))
+
+
+# Run the panel jobs
+if __name__ == "__main__":
+    # Parse the arguments
+    parser = argparse.ArgumentParser(description="Build or update the price panel")
+    parser.add_argument("command", choices=["build", "update"])
+    parser.add_argument("--exchange", choices=["BSE", "NSE"], default="BSE")
+    parser.add_argument("--period", default="5y")
+    args = parser.parse_args()
+
+    # Build the panel
+    if args.command == "build":
+        panel = build_panel(args.exchange, args.period)
+        print(f"Built panel with {panel.length} dates x {len(panel.tickers)} tickers")
+
+    # Update the panel
+    else:
+        print(f"Appended {update_panel(args.period)} dates to the panel")
@@ -0,0 +1,199 @@
+# Imports
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# Import numpy
+import numpy as np
+
+# Import pandas
+import pandas as pd
+
+# Import scipy
+from scipy.linalg import cho_factor, cho_solve
+
+# Import helper functions
+from helper import fetch_stock_history
+
+# Import the price panel
+from panel import open_panel
+
+# Create the number of trading days in a year
+TRADING_DAYS = 252
+
+# Create dictionary for the number of trading days in each lookback period
+LOOKBACK_DAYS = {"1y": 252, "2y": 504, "5y": 1260}
+
+
+# Function to fetch the aligned daily closes of a basket
+def fetch_basket_closes(stock_tickers, period):
+    # Read the closes from the price panel when it holds the whole basket
+    panel = open_panel()
+    if panel is not None and all(t in panel.ticker_index for t in stock_tickers):
+        return panel.frame("Close", stock_tickers).iloc[-LOOKBACK_DAYS[period] - 1 :]
+
+    # Fetch the histories with bounded concurrency otherwise
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        histories = executor.map(
+            lambda ticker: fetch_stock_history(ticker, period, "1d")["Close"],
+            stock_tickers,
+        )
+
+    # Align the closes on their trading dates
+    closes = pd.concat(list(histories), axis=1, keys=stock_tickers)
+    closes.index = closes.index.tz_localize(None).normalize()
+
+    # Return the closes
+    return closes
+
+
+# Function to estimate a covariance matrix with ledoit-wolf shrinkage
+def ledoit_wolf(returns):
+    # Center the returns
+    x = returns - returns.mean(axis=0)
+    n_obs, n_assets = x.shape
+
+    # Compute the sample covariance
+    sample = x.T @ x / n_obs
+
+    # Build the scaled identity target
+    mu = np.trace(sample) / n_assets
+    target = mu * np.eye(n_assets)
+
+    # Compute the distance of the sample from the target
+    d2 = np.sum((sample - target) ** 2)
+
+    # Compute the variance of the sample covariance from the row norms
+    b2 = (np.sum(np.sum(x**2, axis=1) ** 2) - n_obs * np.sum(sample**2)) / n_obs**2
+
+    # Compute the shrinkage intensity
+    shrinkage = min(b2, d2) / d2 if d2 > 0 else 1.0
+
+    # Return the shrunk covariance and the intensity
+    return shrinkage * target + (1 - shrinkage) * sample, shrinkage
+
+
+# Function to estimate the annualized moments of a basket
+@functools.lru_cache(maxsize=64)
+def estimate_moments(stock_tickers, period, as_of):
+    # Fetch the aligned closes
+    closes = fetch_basket_closes(list(stock_tickers), period)
+
+    # Drop the stocks which traded on less than four fifths of the dates
+    closes = closes.dropna(axis=1, thresh=int(len(closes) * 0.8))
+
+    # Compute the daily returns on the dates every stock traded
+    returns = closes.pct_change().dropna(how="any").to_numpy(dtype=np.float64)
+
+    # Estimate the moments
+    cov, shrinkage = ledoit_wolf(returns)
+    mean = returns.mean(axis=0)
+
+    # Return the annualized moments
+    return {
+        "tickers": list(closes.columns),
+        "mean": mean * TRADING_DAYS,
+        "cov": cov * TRADING_DAYS,
+        "shrinkage": shrinkage,
+        "observations": len(returns),
+    }
+
+
+# Function to compute the risk parity weights
+def risk_parity_weights(cov, tol=1e-10, max_iter=50):
+    # Start from equal positive weights
+    n_assets = len(cov)
+    y = np.full(n_assets, 1 / np.sqrt(np.sum(cov)))
+
+    # Run the newton iterations of the convex risk budgeting problem
+    for _ in range(max_iter):
+        # Compute the gradient and the hessian
+        grad = cov @ y - 1 / (n_assets * y)
+        hess = cov + np.diag(1 / (n_assets * y**2))
+
+        # Compute the newton step
+        step = cho_solve(cho_factor(hess), grad)
+
+        # Shrink the step to keep the weights positive
+        scale = 1.0
+        while np.any(y - scale * step <= 0):
+            scale /= 2
+        y = y - scale * step
+
+        # Stop once the step is negligible
+        if np.max(np.abs(scale * step)) < tol:
+            break
+
+    # Return the weights summing to one
+    return y / y.sum()
+
+
+# Function to compute the efficient frontier and the key portfolios
+def efficient_frontier(mean, cov, risk_free=0.0, n_points=50):
+    # Factor the covariance once
+    factor = cho_factor(cov)
+
+    # Solve for the inverse covariance times ones and the mean together
+    solved = cho_solve(factor, np.column_stack([np.ones(len(mean)), mean]))
+    inv_ones, inv_mean = solved[:, 0], solved[:, 1]
+
+    # Compute the frontier constants
+    a = inv_ones.sum()
+    b = mean @ inv_ones
+    c = mean @ inv_mean
+    d = a * c - b**2
+
+    # Compute the minimum variance portfolio
+    min_variance = inv_ones / a
+
+    # Compute the maximum sharpe portfolio if it lies on the efficient branch
+    excess = b - risk_free * a
+    max_sharpe = (inv_mean - risk_free * inv_ones) / excess if excess > 0 else None
+
+    # Compute the risk parity portfolio
+    risk_parity = risk_parity_weights(cov)
+
+    # Span the efficient branch up to the best single stock or the tangency
+    top = max(mean.max(), mean @ max_sharpe if max_sharpe is not None else -np.inf)
+    targets = np.linspace(b / a, top, n_points)
+
+    # Compute the weights of every frontier point in one matrix product
+    coefs = np.column_stack([(c - targets * b) / d, (targets * a - b) / d])
+    weights = coefs @ np.vstack([inv_ones, inv_mean])
+
+    # Compute the risk of every frontier point in closed form
+    risks = np.sqrt((a * targets**2 - 2 * b * targets + c) / d)
+
+    # Return the frontier and the portfolios
+    return {
+        "frontier": pd.DataFrame({"Risk": risks, "Return": targets}),
+        "weights": weights,
+        "portfolios": {
+            "Min Variance": min_variance,
+            "Max Sharpe": max_sharpe,
+            "Risk Parity": risk_parity,
+        },
+    }
+
+
+# Function to summarize the risk and return of portfolios
+def summarize_portfolios(portfolios, mean, cov, risk_free=0.0):
+    # Create dictionary for the rows
+    rows = {}
+
+    # Compute the statistics of every portfolio
+    for name, weights in portfolios.items():
+        # Skip the portfolios which do not exist
+        if weights is None:
+            continue
+
+        # Compute the statistics
+        ret = weights @ mean
+        risk = np.sqrt(weights @ cov @ weights)
+        rows[name] = {
+            "Return": ret,
+            "Risk": risk,
+            "Sharpe": (ret - risk_free) / risk,
+        }
+
+    # Return the summary
+    return pd.DataFrame(rows).T
@@ -0,0 +1,190 @@
+# Imports
+import argparse
+import datetime as dt
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Import pandas
+import pandas as pd
+
+# Import helper functions
+from helper import (
+    fetch_stock_history,
+    fetch_stock_info,
+    generate_stock_prediction,
+    history_ttl,
+)
+
+# Import the shared cache
+from sharedcache import shared_cache
+
+# Create the number of popular selections to pre-warm
+TOP_N = int(os.environ.get("STOCKASTIC_PREWARM_TOP", 20))
+
+# Create the number of concurrent fetches while pre-warming
+MAX_WORKERS = int(os.environ.get("STOCKASTIC_PREWARM_WORKERS", 4))
+
+# Create the time of the scheduled pre-warm before the market opens
+PREWARM_TIME = dt.time(9, 5)
+
+# Create the shortest time to live worth pre-warming, as the intraday histories
+# expire long before the market opens
+MIN_TTL = 10 * 60
+
+# Create the number of days an access counts towards the popularity
+ACCESS_WINDOW_DAYS = 30
+
+# Create the lock guarding the start of the scheduler
+_start_lock = threading.Lock()
+
+# Create the scheduler thread of this process
+_scheduler = None
+
+
+# Function to fetch the connection with the access table
+def connection():
+    # Fetch the connection of the shared cache
+    conn = shared_cache.connection()
+
+    # Create the table of the access counts
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS accesses (ticker TEXT NOT NULL, "
+        "period TEXT NOT NULL, interval TEXT NOT NULL, "
+        "hits INTEGER NOT NULL, last_seen REAL NOT NULL, "
+        "PRIMARY KEY (ticker, period, interval))"
+    )
+
+    # Return the connection
+    return conn
+
+
+# Function to count an access to a stock, by default to its info only
+def record_access(stock_ticker, period="", interval=""):
+    # Try to count the access
+    try:
+        connection().execute(
+            "INSERT INTO accesses (ticker, period, interval, hits, last_seen) "
+            "VALUES (?, ?, ?, 1, ?) ON CONFLICT (ticker, period, interval) "
+            "DO UPDATE SET hits = hits + 1, last_seen = excluded.last_seen",
+            (stock_ticker, period, interval, time.time()),
+        )
+
+    # If the database is unavailable the access is not counted
+    except (sqlite3.Error, OSError):
+        pass
+
+
+# Function to fetch the most popular selections
+def fetch_popular(n=TOP_N):
+    # Fetch the selections seen recently ordered by their access count
+    return (
+        connection()
+        .execute(
+            "SELECT ticker, period, interval FROM accesses WHERE last_seen > ? "
+            "ORDER BY hits DESC LIMIT ?",
+            (time.time() - ACCESS_WINDOW_DAYS * 86400, n),
+        )
+        .fetchall()
+    )
+
+
+# Function to pre-warm the caches of the most popular selections
+def prewarm(n=TOP_N, max_workers=MAX_WORKERS):
+    # Fetch the popular selections
+    try:
+        selections = fetch_popular(n)
+
+    # If the database is unavailable there is nothing to pre-warm
+    except (sqlite3.Error, OSError):
+        return 0
+
+    # Create the list of the fetches of the histories which stay fresh until used
+    tasks = [
+        (fetch_stock_history, selection)
+        for selection in selections
+        if selection[1] and history_ttl(*selection) >= MIN_TTL
+    ]
+
+    # Add the info and forecast once per stock
+    tickers = list(dict.fromkeys(ticker for ticker, _, _ in selections))
+    tasks += [(fetch_stock_info, (ticker,)) for ticker in tickers]
+    tasks += [(generate_stock_prediction, (ticker,)) for ticker in tickers]
+
+    # Function to run a fetch and ignore its failure
+    def run(task):
+        # Try to run the fetch
+        func, args = task
+        try:
+            func(*args)
+            return True
+
+        # If the fetch fails the page will retry it
+        except Exception:
+            return False
+
+    # Run the fetches with bounded concurrency
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        warmed = sum(executor.map(run, tasks))
+
+    # Return the number of warmed entries
+    return warmed
+
+
+# Function to fetch the seconds until the next scheduled pre-warm
+def seconds_until_next(now=None):
+    # Start from the scheduled time today
+    now = now or pd.Timestamp.now(tz="Asia/Kolkata")
+    target = now.normalize() + pd.Timedelta(
+        hours=PREWARM_TIME.hour, minutes=PREWARM_TIME.minute
+    )
+
+    # Move to the next weekday if the time has passed
+    if target <= now:
+        target += pd.Timedelta(days=1)
+    while target.weekday() >= 5:
+        target += pd.Timedelta(days=1)
+
+    # Return the seconds
+    return (target - now).total_seconds()
+
+
+# Function to pre-warm at start and then every weekday before the market opens
+def run_scheduler():
+    # Pre-warm the caches of a fresh process
+    prewarm()
+
+    # Pre-warm before every market open
+    while True:
+        time.sleep(seconds_until_next())
+        prewarm()
+
+
+# Function to start the scheduler once per process
+def ensure_started():
+    # Declare the scheduler thread
+    global _scheduler
+
+    # Start the scheduler unless it is running
+    with _start_lock:
+        if _scheduler is None:
+            _scheduler = threading.Thread(
+                target=run_scheduler, name="prewarm", daemon=True
+            )
+            _scheduler.start()
+
+
+# Run a single pre-warm
+if __name__ == "__main__":
+    # Parse the arguments
+    parser = argparse.ArgumentParser(description="Pre-warm the popular stocks")
+    parser.add_argument("--top", type=int, default=TOP_N)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    # Pre-warm the caches
+    started = time.perf_counter()
+    warmed = prewarm(args.top, args.workers)
+    print(f"Warmed {warmed} entries in {time.perf_counter() - started:.1f}s")
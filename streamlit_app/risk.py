@@ -0,0 +1,448 @@
+# Imports
+import argparse
+import os
+import threading
+import zipfile
+
+# Import numpy
+import numpy as np
+
+# Import pandas
+import pandas as pd
+
+# Import scipy
+from scipy.optimize import minimize
+from scipy.signal import lfilter
+from scipy.stats import norm
+
+# Import the shared frame cache
+from framecache import cached
+
+# Import helper functions
+from helper import fetch_stock_history, prediction_ttl
+
+# Import the price panel
+from panel import PANEL_DIR, PricePanel
+
+# Import the shared disk cache helpers
+from sharedcache import safe_get, safe_set
+
+# Create the number of trading days in a year
+TRADING_DAYS = 252
+
+# Create the horizon of the risk forecasts in calendar days and trading sessions
+RISK_DAYS = 90
+RISK_SESSIONS = int(RISK_DAYS * TRADING_DAYS / 365)
+
+# Create the decay of the ewma variance
+EWMA_LAMBDA = 0.94
+
+# Create the confidence level of the value at risk
+VAR_LEVEL = 0.99
+
+# Create the upper bound of the garch persistence
+MAX_PERSISTENCE = 0.999
+
+# Create the starting garch parameters of a stock without a previous fit
+GARCH_START = (0.05, 0.90)
+
+# Create the minimum number of returns to fit a garch model
+MIN_OBSERVATIONS = 250
+
+# Create the number of seconds a garch fit is kept to warm start the next one
+FIT_TTL = 30 * 24 * 60 * 60
+
+# Create the storage for the universe scores loaded by this process
+_scores = {}
+
+# Create the lock guarding the universe scores
+_scores_lock = threading.Lock()
+
+
+# Function to compute the daily log returns in percent
+def daily_returns(close):
+    # Return the returns
+    return 100 * np.diff(np.log(np.asarray(close, dtype=np.float64)), axis=0)
+
+
+# Function to compute the conditional variances of a garch(1,1) process
+def conditional_variance(squared, long_run, alpha, beta):
+    # Target the long run variance so the constant is implied
+    omega = long_run * (1 - alpha - beta)
+
+    # Shift the squared returns by a day, starting from the long run variance
+    start = np.asarray(long_run, dtype=np.float64)[None]
+    lagged = np.concatenate([start, squared[:-1]])
+
+    # Run the variance recursion as a filter along the dates
+    variance, _ = lfilter(
+        [1.0], [1.0, -beta], omega + alpha * lagged, axis=0, zi=beta * start
+    )
+
+    # Return the variances and the variance of the next day
+    return variance, omega + alpha * squared[-1] + beta * variance[-1]
+
+
+# Function to compute the negative log likelihood of a garch(1,1) process
+def garch_nll(params, squared, long_run):
+    # Compute the conditional variances
+    variance, _ = conditional_variance(squared, long_run, *params)
+
+    # Return the gaussian negative log likelihood
+    return 0.5 * np.sum(np.log(variance) + squared / variance)
+
+
+# Function to fit a garch(1,1) model to the returns of a stock
+def fit_garch(returns, start=GARCH_START):
+    # Center the returns and target their variance
+    squared = (returns - returns.mean()) ** 2
+    long_run = squared.mean()
+
+    # Maximize the likelihood with a stationary persistence
+    result = minimize(
+        garch_nll,
+        np.asarray(start, dtype=np.float64),
+        args=(squared, long_run),
+        method="SLSQP",
+        bounds=[(1e-6, 1.0), (0.0, 1.0)],
+        constraints=[{"type": "ineq", "fun": lambda x: MAX_PERSISTENCE - x[0] - x[1]}],
+    )
+
+    # Return the parameters
+    return tuple(float(x) for x in result.x)
+
+
+# Function to forecast the daily variances of the next sessions
+def forecast_variance(next_variance, long_run, persistence, sessions=RISK_SESSIONS):
+    # Return the variances reverting to the long run variance
+    steps = np.arange(sessions).reshape((-1,) + (1,) * np.ndim(next_variance))
+    return long_run + persistence**steps * (next_variance - long_run)
+
+
+# Function to compute the value at risk in percent from the cumulative variance
+def value_at_risk(cumulative_variance, level=VAR_LEVEL):
+    # Return the loss not exceeded with the given confidence
+    return 100 * (1 - np.exp(norm.ppf(1 - level) * np.sqrt(cumulative_variance) / 100))
+
+
+# Function to forecast the volatility and value at risk of a stock
+@cached(ttl=prediction_ttl)
+def forecast_risk(stock_ticker):
+    # Compute the returns of the last two years
+    close = fetch_stock_history(stock_ticker, "2y", "1d")["Close"].dropna()
+    returns = daily_returns(close)
+    if len(returns) < MIN_OBSERVATIONS:
+        return None, None, None
+
+    # Center the returns and target their variance
+    squared = (returns - returns.mean()) ** 2
+    long_run = squared.mean()
+
+    # Warm start the garch fit from the previous fit of the stock
+    key = f"fit_garch('{stock_ticker}',)"
+    alpha, beta = fit_garch(returns, safe_get(key) or GARCH_START)
+    safe_set(key, (alpha, beta), FIT_TTL)
+
+    # Create dictionary for the parameters of both models
+    params = {"EWMA": (1 - EWMA_LAMBDA, EWMA_LAMBDA), "GARCH": (alpha, beta)}
+
+    # Build the future trading sessions
+    last = close.index[-1].tz_localize(None).normalize()
+    dates = pd.bdate_range(last, periods=RISK_SESSIONS + 1)
+
+    # Create dictionaries for the history, the forecasts and the summary
+    history, forecast, summary = {}, {}, {}
+
+    # Filter and forecast the variance with both models
+    for name, (a, b) in params.items():
+        # Filter the conditional variances
+        variance, next_variance = conditional_variance(squared, long_run, a, b)
+
+        # Forecast the daily variances and cumulate them over the horizon
+        daily = forecast_variance(next_variance, long_run, a + b)
+        cumulative = np.cumsum(daily)
+
+        # Store the annualized volatilities and the value at risk
+        history[f"{name} Volatility"] = np.sqrt(variance * TRADING_DAYS)
+        forecast[f"{name} Volatility"] = np.sqrt(daily * TRADING_DAYS)
+        forecast[f"{name} VaR"] = value_at_risk(cumulative)
+        summary[name] = {
+            "Alpha": a,
+            "Beta": b,
+            "Volatility (%)": np.sqrt(next_variance * TRADING_DAYS),
+            f"{RISK_DAYS}-day Volatility (%)": np.sqrt(cumulative[-1]),
+            f"{RISK_DAYS}-day VaR (%)": value_at_risk(cumulative[-1]),
+        }
+
+    # Return the history, the forecasts and the summary
+    return (
+        pd.DataFrame(history, index=close.index[1:].tz_localize(None)),
+        pd.DataFrame(forecast, index=dates[1:]),
+        pd.DataFrame(summary).T,
+    )
+
+
+# Function to center the returns of many stocks and fill their missing squares
+def centered_squares(returns):
+    # Center the returns of every stock and target their variance
+    valid = np.isfinite(returns)
+    squared = np.where(valid, returns - np.nanmean(returns, axis=0), 0.0) ** 2
+    counts = valid.sum(axis=0)
+    long_run = squared.sum(axis=0) / np.maximum(counts, 1)
+    long_run = np.where(long_run > 0, long_run, 1.0)
+
+    # Treat the days without a return as average days
+    squared = np.where(valid, squared, long_run)
+
+    # Return the squares, the validity mask and the long run variances
+    return squared, valid, long_run
+
+
+# Function to compute the garch likelihood and its scores for many stocks at once
+def garch_batch_scores(squared, mask, long_run, alpha, beta, with_scores=True):
+    # Start every stock from its long run variance
+    n_dates, n_stocks = squared.shape
+    omega = long_run * (1 - alpha - beta)
+    variance = long_run.copy()
+    d_alpha = np.zeros(n_stocks)
+    d_beta = np.zeros(n_stocks)
+
+    # Create the accumulators of the likelihood, the gradient and the bhhh matrix
+    nll = np.zeros(n_stocks)
+    grad = np.zeros((2, n_stocks))
+    bhhh = np.zeros((3, n_stocks))
+
+    # Run the recursion along the dates for every stock at once
+    for t in range(n_dates):
+        # Update the variance and its derivatives from the previous day
+        if t > 0:
+            if with_scores:
+                d_alpha = squared[t - 1] - long_run + beta * d_alpha
+                d_beta = variance - long_run + beta * d_beta
+            variance = omega + alpha * squared[t - 1] + beta * variance
+
+        # Add the likelihood of the days with a return
+        ratio = squared[t] / variance
+        nll += mask[t] * (np.log(variance) + ratio)
+
+        # Add the scores of the days with a return
+        if with_scores:
+            weight = mask[t] * (1 - ratio) / variance
+            score_alpha, score_beta = weight * d_alpha, weight * d_beta
+            grad += (score_alpha, score_beta)
+            bhhh += (score_alpha**2, score_alpha * score_beta, score_beta**2)
+
+    # Compute the variance of the next day
+    next_variance = omega + alpha * squared[-1] + beta * variance
+
+    # Return the likelihood, the gradient, the bhhh matrix and the next variance
+    return 0.5 * nll, 0.5 * grad, 0.25 * bhhh, next_variance
+
+
+# Function to fit garch(1,1) models to many stocks at once
+def fit_garch_batch(returns, start=None, max_iter=25, tol=1e-4):
+    # Center the returns and fill the days without a return
+    squared, valid, long_run = centered_squares(returns)
+    mask = valid.astype(np.float64)
+    counts = valid.sum(axis=0)
+
+    # Start from the previous fits or the defaults
+    alpha = np.full(returns.shape[1], GARCH_START[0])
+    beta = np.full(returns.shape[1], GARCH_START[1])
+    if start is not None:
+        alpha = np.where(np.isfinite(start[0]), start[0], alpha)
+        beta = np.where(np.isfinite(start[1]), start[1], beta)
+
+    # Run the bhhh iterations on the stocks which have not converged
+    active = counts >= MIN_OBSERVATIONS
+    for _ in range(max_iter):
+        # Select the columns of the active stocks
+        idx = np.flatnonzero(active)
+        if not len(idx):
+            break
+        sq, mk, lr = squared[:, idx], mask[:, idx], long_run[idx]
+        a, b = alpha[idx], beta[idx]
+
+        # Compute the likelihood, the gradient and the bhhh matrix
+        nll, grad, bhhh, _ = garch_batch_scores(sq, mk, lr, a, b)
+
+        # Solve the two by two systems in closed form
+        h11, h12, h22 = bhhh
+        h11, h22 = h11 + 1e-8, h22 + 1e-8
+        det = h11 * h22 - h12**2
+        step_a = (h22 * grad[0] - h12 * grad[1]) / det
+        step_b = (h11 * grad[1] - h12 * grad[0]) / det
+
+        # Halve the steps until they improve the likelihood
+        scale = np.ones(len(idx))
+        moved = np.zeros(len(idx))
+        gain = np.zeros(len(idx))
+        for _ in range(8):
+            # Try the steps projected onto the stationary parameters
+            new_a = np.clip(a - scale * step_a, 1e-6, MAX_PERSISTENCE)
+            new_b = np.clip(b - scale * step_b, 0.0, MAX_PERSISTENCE - new_a)
+
+            # Evaluate the likelihood at the steps
+            new_nll, _, _, _ = garch_batch_scores(sq, mk, lr, new_a, new_b, False)
+
+            # Accept the improving steps and halve the others
+            accepted = (new_nll <= nll) & (scale > 0)
+            moved = np.where(accepted, np.hypot(new_a - a, new_b - b), moved)
+            a, b = np.where(accepted, new_a, a), np.where(accepted, new_b, b)
+            gain = np.where(accepted, nll - new_nll, gain)
+            scale = np.where(accepted, 0.0, scale / 2)
+            if not scale.any():
+                break
+
+        # Store the parameters
+        alpha[idx], beta[idx] = a, b
+
+        # Stop the stocks whose steps or likelihood gains became negligible
+        active[idx] = (moved > tol) & (gain > tol)
+
+    # Return the parameters and the variance of the next day
+    *_, next_variance = garch_batch_scores(squared, mask, long_run, alpha, beta, False)
+    return alpha, beta, long_run, next_variance
+
+
+# Function to score the volatility and value at risk of every panel stock
+def score_universe(panel, start=None):
+    # Compute the returns of every stock
+    returns = daily_returns(panel.values("Close"))
+
+    # Fit the garch models of every stock at once
+    alpha, beta, long_run, next_variance = fit_garch_batch(returns, start)
+
+    # Filter the ewma variances of every stock at once
+    squared, valid, long_run = centered_squares(returns)
+    _, ewma_next = conditional_variance(squared, long_run, 1 - EWMA_LAMBDA, EWMA_LAMBDA)
+
+    # Cumulate the garch variances over the horizon
+    cumulative = forecast_variance(next_variance, long_run, alpha + beta).sum(axis=0)
+
+    # Skip the stocks with too few returns
+    enough = valid.sum(axis=0) >= MIN_OBSERVATIONS
+
+    # Return the scores with the panel they were computed from
+    return {
+        "length": np.asarray(panel.length),
+        "last_date": np.asarray(panel_last_day(panel)),
+        "tickers": np.asarray(panel.tickers, dtype=str),
+        "alpha": np.where(enough, alpha, np.nan),
+        "beta": np.where(enough, beta, np.nan),
+        "ewma": np.where(enough, np.sqrt(ewma_next * TRADING_DAYS), np.nan),
+        "garch": np.where(enough, np.sqrt(next_variance * TRADING_DAYS), np.nan),
+        "horizon": np.where(enough, np.sqrt(cumulative), np.nan),
+        "var": np.where(enough, value_at_risk(cumulative), np.nan),
+    }
+
+
+# Function to fetch the last date of the panel in days since the epoch
+def panel_last_day(panel):
+    # Return the day of the last row or -1 for an empty panel
+    return int(panel.dates[panel.length - 1]) if panel.length else -1
+
+
+# Function to check whether scores were computed from the current panel
+def scores_match(scores, panel):
+    # Compare the length, the last date and the tickers
+    return (
+        "last_date" in scores
+        and int(scores["length"]) == panel.length
+        and int(scores["last_date"]) == panel_last_day(panel)
+        and np.array_equal(scores["tickers"], np.asarray(panel.tickers, dtype=str))
+    )
+
+
+# Function to load the stored scores of the universe
+def load_scores(panel):
+    # Try to load the scores
+    try:
+        with np.load(panel.path / "risk.npz", allow_pickle=False) as stored:
+            return dict(stored)
+
+    # If the scores are missing or unreadable
+    except (OSError, ValueError, zipfile.BadZipFile):
+        return None
+
+
+# Function to update the stored scores of the universe
+def update_scores(panel):
+    # Return the stored scores if they are current
+    stored = load_scores(panel)
+    if stored is not None and scores_match(stored, panel):
+        return stored
+
+    # Warm start the fits from the stored parameters of the same tickers
+    start = None
+    if stored is not None:
+        previous = pd.DataFrame(
+            {"alpha": stored["alpha"], "beta": stored["beta"]},
+            index=stored["tickers"],
+        ).reindex(panel.tickers)
+        start = (previous["alpha"].to_numpy(), previous["beta"].to_numpy())
+
+    # Score the universe
+    scores = score_universe(panel, start)
+
+    # Store the scores atomically
+    path = panel.path / "risk.npz"
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **scores)
+    os.replace(tmp_path, path)
+
+    # Return the scores
+    return scores
+
+
+# Function to fetch the stored scores of the universe aligned with the panel
+def fetch_universe_risk(panel):
+    # Fetch the version of the stored scores
+    try:
+        version = (panel.path / "risk.npz").stat().st_mtime_ns
+
+    # Return no scores if they have not been computed, as fitting the whole
+    # universe takes far too long for a page view
+    except OSError:
+        return None, False
+
+    # Load the scores once per version of the file
+    with _scores_lock:
+        if version not in _scores:
+            _scores.clear()
+            _scores[version] = load_scores(panel)
+        scores = _scores[version]
+
+    # Return no scores if the file is unreadable
+    if scores is None:
+        return None, False
+
+    # Build the dataframe of the scored tickers
+    frame = pd.DataFrame(
+        {
+            "Alpha": scores["alpha"],
+            "Beta": scores["beta"],
+            "EWMA Volatility (%)": scores["ewma"],
+            "GARCH Volatility (%)": scores["garch"],
+            f"{RISK_DAYS}-day Volatility (%)": scores["horizon"],
+            f"{RISK_DAYS}-day VaR (%)": scores["var"],
+        },
+        index=pd.Index(scores["tickers"], name="Ticker"),
+    )
+
+    # Return the scores in the order of the panel and whether they are current
+    current = scores_match(scores, panel)
+    return frame.reindex(pd.Index(panel.tickers, name="Ticker")), current
+
+
+# Run the universe scoring
+if __name__ == "__main__":
+    # Parse the arguments
+    parser = argparse.ArgumentParser(description="Score the risk of the universe")
+    parser.add_argument("command", choices=["score"])
+    args = parser.parse_args()
+
+    # Score the universe
+    scores = update_scores(PricePanel(PANEL_DIR))
+    print(f"Scored {np.isfinite(scores['var']).sum()} tickers")
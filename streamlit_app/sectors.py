@@ -0,0 +1,306 @@
+# Imports
+import argparse
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Import numpy
+import numpy as np
+
+# Import pandas
+import pandas as pd
+
+# Import helper functions
+from helper import fetch_stock_info
+
+# Import the price panel
+from panel import PANEL_DIR, PricePanel, open_panel
+
+# Create dictionary for the classification levels and their columns
+LEVELS = {
+    "Sector": "Sector Name",
+    "Industry": "Industry New Name",
+    "Industry Group": "Igroup Name",
+    "Industry Subgroup": "ISubgroup Name",
+}
+
+# Create tuple for the weighting schemes
+WEIGHTINGS = ("Equal", "Cap")
+
+# Create the storage for the composites computed by this process
+_composites = {}
+
+# Create the lock guarding the composites
+_composites_lock = threading.Lock()
+
+
+# Function to fetch the classification of every issuer
+@functools.lru_cache(maxsize=1)
+def fetch_classification():
+    # Load the data without using the first column as index as rows end with a comma
+    df = pd.read_csv(Path.cwd() / "data" / "equity_issuers.csv", index_col=False)
+
+    # Index the classification by the security id
+    df = df.set_index("Security Id")[list(LEVELS.values())]
+
+    # Treat the placeholders as unclassified
+    df = df.replace("-", np.nan)
+
+    # Return the classification
+    return df[~df.index.duplicated()]
+
+
+# Function to fetch the group of every panel ticker
+def fetch_panel_groups(panel, level):
+    # Map the tickers to their security ids
+    security_ids = [ticker.rsplit(".", 1)[0] for ticker in panel.tickers]
+
+    # Return the groups in panel order
+    return fetch_classification()[LEVELS[level]].reindex(security_ids).to_numpy()
+
+
+# Function to compute the daily returns of the composites
+def composite_returns(close, groups, shares=None):
+    # Compute the daily returns of every ticker
+    close = np.asarray(close, dtype=np.float64)
+    returns = close[1:] / close[:-1] - 1
+    valid = np.isfinite(returns)
+    returns = np.where(valid, returns, 0.0)
+
+    # Build the membership matrix of the tickers in the groups
+    codes, names = pd.factorize(pd.Series(groups))
+    membership = np.zeros((len(codes), len(names)))
+    membership[codes >= 0, codes[codes >= 0]] = 1.0
+
+    # Compute the equal weighted returns
+    with np.errstate(invalid="ignore", divide="ignore"):
+        equal = (returns @ membership) / (valid @ membership)
+
+    # Skip the cap weighted returns if the shares are unknown
+    if shares is None:
+        return list(names), equal, None
+
+    # Weigh every ticker by its market cap at the previous close
+    weights = np.nan_to_num(close[:-1] * np.asarray(shares, dtype=np.float64))
+    weights = np.where(valid, weights, 0.0)
+
+    # Compute the cap weighted returns
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cap = ((returns * weights) @ membership) / (weights @ membership)
+
+    # Return the returns
+    return list(names), equal, cap
+
+
+# Function to chain the returns into index levels
+def chain_levels(returns, start):
+    # Treat the days without constituents as flat
+    growth = np.nan_to_num(1 + returns, nan=1.0)
+
+    # Return the levels starting from the previous levels
+    return start * np.cumprod(growth, axis=0)
+
+
+# Function to fetch the path of the stored composites
+def composites_path(panel, level):
+    # Return the path next to the panel
+    return panel.path / f"composites.{level.lower().replace(' ', '_')}.npz"
+
+
+# Function to load the stored shares outstanding of the panel tickers
+def load_shares(panel):
+    # Return None if the shares have not been fetched
+    path = panel.path / "shares.npy"
+    if not path.exists():
+        return None
+
+    # Return the shares
+    return np.load(path)
+
+
+# Function to store the composites atomically
+def save_composites(path, stored):
+    # Write to a temporary file and swap it in
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **stored)
+    os.replace(tmp_path, path)
+
+
+# Function to update the composites with the dates added to the panel
+def update_composites(panel, level):
+    # Fetch the groups and the shares
+    groups = fetch_panel_groups(panel, level)
+    shares = load_shares(panel)
+    close = panel.values("Close")
+    dates = panel.dates[: panel.length]
+
+    # Load the stored composites
+    path = composites_path(panel, level)
+    stored = dict(np.load(path, allow_pickle=False)) if path.exists() else None
+
+    # Extend the stored composites if they match the panel
+    if (
+        stored is not None
+        and stored["has_cap"] == (shares is not None)
+        and len(stored["dates"]) <= len(dates)
+        and np.array_equal(stored["dates"], dates[: len(stored["dates"])])
+    ):
+        # Return the stored composites if they are current
+        start = len(stored["dates"]) - 1
+        if start == len(dates) - 1:
+            return stored
+
+        # Compute the returns of the new dates only
+        names, equal, cap = composite_returns(close[start:], groups, shares)
+
+        # Extend the levels if the groups did not change
+        if names == list(stored["groups"]):
+            stored["equal"] = np.vstack(
+                [stored["equal"], chain_levels(equal, stored["equal"][-1])]
+            )
+            if cap is not None:
+                stored["cap"] = np.vstack(
+                    [stored["cap"], chain_levels(cap, stored["cap"][-1])]
+                )
+            stored["dates"] = np.asarray(dates)
+            save_composites(path, stored)
+            return stored
+
+    # Compute the composites over the whole panel
+    names, equal, cap = composite_returns(close, groups, shares)
+    base = np.full((1, len(names)), 100.0)
+    stored = {
+        "dates": np.asarray(dates),
+        "groups": np.asarray(names, dtype=str),
+        "equal": np.vstack([base, chain_levels(equal, base[0])]),
+        "cap": base if cap is None else np.vstack([base, chain_levels(cap, base[0])]),
+        "has_cap": np.asarray(shares is not None),
+    }
+
+    # Store the composites
+    save_composites(path, stored)
+
+    # Return the composites
+    return stored
+
+
+# Function to fetch the composites of a level as a dataframe
+def fetch_composites(level, weighting="Equal"):
+    # Return None if the panel has not been built
+    panel = open_panel()
+    if panel is None:
+        return None
+
+    # Update the composites once per panel update
+    with _composites_lock:
+        key = (level, panel.length)
+        if key not in _composites:
+            # Drop the composites of the previous panel update
+            for old_key in [k for k in _composites if k[1] != panel.length]:
+                del _composites[old_key]
+
+            # Update the composites
+            _composites[key] = update_composites(panel, level)
+        stored = _composites[key]
+
+    # Return None if the cap weighted composites are unavailable
+    if weighting == "Cap" and not stored["has_cap"]:
+        return None
+
+    # Return the dataframe
+    return pd.DataFrame(
+        stored["equal" if weighting == "Equal" else "cap"],
+        index=pd.DatetimeIndex(stored["dates"].astype("datetime64[D]")),
+        columns=list(stored["groups"]),
+    )
+
+
+# Function to fetch the group of a stock
+def fetch_stock_group(security_id, level):
+    # Return the group or None if unclassified
+    group = fetch_classification()[LEVELS[level]].get(security_id)
+    return None if pd.isna(group) else group
+
+
+# Function to rebase a stock and its composite to 100 on their first common date
+def rebase(stock_close, composite):
+    # Align the series on their common dates
+    aligned = pd.concat([stock_close, composite], axis=1, join="inner").dropna()
+
+    # Return None if the series share no dates
+    if aligned.empty:
+        return None, None
+
+    # Return the rebased series
+    rebased = aligned / aligned.iloc[0] * 100
+    return rebased.iloc[:, 0], rebased.iloc[:, 1]
+
+
+# Function to summarize the performance of the composites
+def summarize_composites(composites):
+    # Create dictionary for the trailing windows in trading days
+    windows = {"1D": 1, "1M": 21, "3M": 63, "1Y": 252}
+
+    # Compute the trailing returns of every composite
+    summary = pd.DataFrame(
+        {
+            name: composites.iloc[-1] / composites.iloc[-1 - days] - 1
+            for name, days in windows.items()
+            if len(composites) > days
+        }
+    )
+
+    # Return the unsorted summary if no window fits the composites
+    if summary.empty:
+        return summary
+
+    # Return the summary sorted by the longest available return
+    return (summary * 100).round(2).sort_values(summary.columns[-1], ascending=False)
+
+
+# Function to fetch the shares outstanding of every panel ticker
+def fetch_panel_shares(panel, max_workers=8):
+    # Function to fetch the shares of a ticker
+    def fetch_shares(stock_ticker):
+        # Try to fetch the shares
+        try:
+            shares = fetch_stock_info(stock_ticker)["Volume and Shares"][
+                "sharesOutstanding"
+            ]
+            return float(shares) if shares != "N/A" else np.nan
+
+        # If the info is unavailable
+        except Exception:
+            return np.nan
+
+    # Fetch the shares with bounded concurrency
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        shares = np.array(list(executor.map(fetch_shares, panel.tickers)))
+
+    # Store the shares next to the panel
+    np.save(panel.path / "shares.npy", shares)
+
+    # Return the shares
+    return shares
+
+
+# Run the composite jobs
+if __name__ == "__main__":
+    # Parse the arguments
+    parser = argparse.ArgumentParser(description="Update the composite indices")
+    parser.add_argument("command", choices=["update", "shares"])
+    args = parser.parse_args()
+
+    # Fetch the shares outstanding for the cap weighted composites
+    panel = PricePanel(PANEL_DIR)
+    if args.command == "shares":
+        shares = fetch_panel_shares(panel)
+        print(f"Fetched shares for {np.isfinite(shares).sum()} tickers")
+
+    # Update the composites of every level
+    for level in LEVELS:
+        stored = update_composites(panel, level)
+        print(f"{level}: {len(stored['groups'])} composites")
@@ -0,0 +1,247 @@
+# Imports
+import functools
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+# Import the compact frame helpers
+from framecache import compact, expand, is_cacheable, limit_expiry
+
+# Create the number of seconds a worker may hold a computation lease
+LEASE_SECONDS = 120
+
+# Create the number of seconds between polls while another worker computes
+POLL_SECONDS = 0.1
+
+# Create the number of seconds between two purges of the expired entries
+PURGE_SECONDS = 10 * 60
+
+
+# Create class for a disk-backed cache shared by every worker process
+class SharedCache:
+    # Initialize the cache
+    def __init__(self, path):
+        # Store the path of the database
+        self.path = Path(path)
+
+        # Create the storage for the per thread connections
+        self.local = threading.local()
+
+        # Create the identity of this process for the leases
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+
+        # Create the time of the last purge of this process
+        self.last_purge = time.monotonic()
+
+    # Function to fetch the connection of the current thread
+    def connection(self):
+        # Return the existing connection
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            return conn
+
+        # Create the database folder
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Open the database in autocommit mode
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+        # Let readers and the writer work concurrently
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        # Create the tables
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases "
+            "(key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+        # Store the connection
+        self.local.conn = conn
+
+        # Return the connection
+        return conn
+
+    # Function to fetch a fresh entry with its expiry time
+    def get_entry(self, key):
+        # Fetch the entry
+        row = (
+            self.connection()
+            .execute(
+                "SELECT value, expires_at FROM entries "
+                "WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+
+        # Return the value and its expiry if present
+        return (pickle.loads(row[0]), row[1]) if row is not None else (None, None)
+
+    # Function to fetch a fresh entry
+    def get(self, key):
+        # Return the value
+        return self.get_entry(key)[0]
+
+    # Function to store an entry
+    def set(self, key, value, ttl):
+        # Store the entry
+        self.connection().execute(
+            "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), time.time() + ttl),
+        )
+
+    # Function to take the lease to compute an entry
+    def acquire(self, key, seconds=LEASE_SECONDS):
+        # Fetch the connection
+        conn = self.connection()
+        now = time.time()
+
+        # Drop the lease of a worker which died while computing
+        conn.execute("DELETE FROM leases WHERE key = ? AND expires_at <= ?", (key, now))
+
+        # Take the lease if no other worker holds it
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+            (key, self.owner, now + seconds),
+        )
+
+        # Return whether the lease was taken
+        return cursor.rowcount == 1
+
+    # Function to give back the lease of an entry
+    def release(self, key):
+        # Remove the lease
+        self.connection().execute(
+            "DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner)
+        )
+
+    # Function to remove the expired entries
+    def purge(self):
+        # Remove the entries
+        self.connection().execute(
+            "DELETE FROM entries WHERE expires_at <= ?", (time.time(),)
+        )
+
+    # Function to remove the expired entries unless this process did recently
+    def maybe_purge(self):
+        # Skip the purge if this process purged recently
+        now = time.monotonic()
+        if now - self.last_purge < PURGE_SECONDS:
+            return
+
+        # Remove the entries
+        self.last_purge = now
+        self.purge()
+
+
+# Create the cache shared by every worker process
+shared_cache = SharedCache(
+    os.environ.get(
+        "STOCKASTIC_SHARED_CACHE",
+        Path.cwd() / "data" / "cache" / "shared_cache.sqlite",
+    )
+)
+
+
+# Function to fetch an entry with its expiry and treat database errors as a miss
+def safe_get_entry(key):
+    # Try to fetch the entry
+    try:
+        return shared_cache.get_entry(key)
+
+    # If the database is unavailable
+    except (sqlite3.Error, pickle.UnpicklingError, OSError):
+        return None, None
+
+
+# Function to fetch an entry and treat database errors as a miss
+def safe_get(key):
+    # Return the value
+    return safe_get_entry(key)[0]
+
+
+# Function to store an entry and ignore database errors
+def safe_set(key, value, ttl):
+    # Try to store the entry and drop the expired ones now and then
+    try:
+        shared_cache.set(key, value, ttl)
+        shared_cache.maybe_purge()
+
+    # If the database is unavailable
+    except (sqlite3.Error, OSError):
+        pass
+
+
+# Function to give back a lease and ignore database errors
+def safe_release(key):
+    # Try to remove the lease
+    try:
+        shared_cache.release(key)
+
+    # If the database is unavailable the lease expires on its own
+    except (sqlite3.Error, OSError):
+        pass
+
+
+# Function to cache the results of a function in the shared disk cache
+def shared_cached(ttl):
+    # Create the decorator
+    def decorator(func):
+        # Create the wrapper
+        @functools.wraps(func)
+        def wrapper(*args):
+            # Build the cache key which is stable across processes
+            key = f"{func.__qualname__}{args!r}"
+
+            # Return the cached value if present and let the outer cache expire with it
+            value, expires_at = safe_get_entry(key)
+            if value is not None:
+                limit_expiry(expires_at)
+                return expand(value)
+
+            # Wait while another worker computes the same value
+            try:
+                leased = shared_cache.acquire(key)
+                deadline = time.monotonic() + LEASE_SECONDS
+                while not leased and time.monotonic() < deadline:
+                    # Return the value once the other worker stored it
+                    time.sleep(POLL_SECONDS)
+                    value, expires_at = safe_get_entry(key)
+                    if value is not None:
+                        limit_expiry(expires_at)
+                        return expand(value)
+
+                    # Take the lease if the other worker gave up
+                    leased = shared_cache.acquire(key)
+
+            # If the database is unavailable compute without the lease
+            except (sqlite3.Error, OSError):
+                leased = False
+
+            # Compute the value and give back the lease once it is stored
+            try:
+                result = func(*args)
+                if is_cacheable(result):
+                    seconds = ttl(*args) if callable(ttl) else ttl
+                    safe_set(key, compact(result), seconds)
+            finally:
+                if leased:
+                    safe_release(key)
+
+            # Return the value
+            return result
+
+        # Return the wrapper
+        return wrapper
+
+    # Return the decorator
+    return decorator
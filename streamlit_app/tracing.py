@@ -0,0 +1,157 @@
+# Imports
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Create tuple for the histogram bucket bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Create the name of the exported metric
+METRIC_NAME = "stockastic_stage_duration_seconds"
+
+# Create tuple for the labels kept out of the histograms as they take too many values
+RUN_ONLY_LABELS = ("ticker", "stocks", "points", "window")
+
+# Create the minimum number of seconds between two exports of a process
+EXPORT_SECONDS = 10
+
+# Create the time of the last export of this process
+_last_export = 0.0
+
+# Create the storage for the histograms keyed by stage and labels
+_histograms = {}
+
+# Create the lock guarding the histograms
+_lock = threading.Lock()
+
+# Create the storage for the spans of the current page run
+_run_spans = contextvars.ContextVar("stockastic_run_spans", default=None)
+
+
+# Function to record a duration into the histograms
+def record(stage, labels, duration):
+    # Build the labels of the run and the histogram key without the run only labels
+    pairs = tuple(sorted((name, str(value)) for name, value in labels.items()))
+    key = (stage, tuple(pair for pair in pairs if pair[0] not in RUN_ONLY_LABELS))
+
+    # Update the histogram
+    with _lock:
+        histogram = _histograms.setdefault(
+            key, {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+        )
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += duration
+        histogram["count"] += 1
+
+    # Add the span to the current run if one is active
+    spans = _run_spans.get()
+    if spans is not None:
+        spans.append(
+            {
+                "Stage": stage,
+                "Labels": ", ".join(f"{name}={value}" for name, value in pairs),
+                "Seconds": round(duration, 4),
+            }
+        )
+
+
+# Function to time a stage of the hot path
+@contextmanager
+def span(stage, **labels):
+    # Start the timer
+    start = time.perf_counter()
+
+    # Run the stage and record its duration
+    try:
+        yield
+    finally:
+        record(stage, labels, time.perf_counter() - start)
+
+
+# Function to start collecting the spans of a page run
+def start_run():
+    # Create a fresh list of spans for this run
+    _run_spans.set([])
+
+
+# Function to fetch the spans of the current page run
+def run_spans():
+    # Return the spans
+    return list(_run_spans.get() or [])
+
+
+# Function to escape a label value for the prometheus text format
+def escape_label(value):
+    # Escape the backslashes, quotes and newlines
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Function to render the histograms in prometheus text format
+def render_prometheus():
+    # Copy the histograms
+    with _lock:
+        histograms = {
+            key: {**value, "buckets": list(value["buckets"])}
+            for key, value in _histograms.items()
+        }
+
+    # Add the header
+    lines = [
+        f"# HELP {METRIC_NAME} Time spent in each stage of the Stockastic hot path.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+
+    # Add the series of every histogram
+    for (stage, labels), histogram in sorted(histograms.items()):
+        # Build the label string with the worker so the processes stay apart
+        label_pairs = [("stage", stage), *labels, ("worker", os.getpid())]
+        label_str = ",".join(
+            f'{name}="{escape_label(value)}"' for name, value in label_pairs
+        )
+
+        # Add the buckets
+        for bound, count in zip(BUCKETS, histogram["buckets"]):
+            lines.append(f'{METRIC_NAME}_bucket{{{label_str},le="{bound}"}} {count}')
+        lines.append(
+            f'{METRIC_NAME}_bucket{{{label_str},le="+Inf"}} {histogram["count"]}'
+        )
+
+        # Add the sum and count
+        lines.append(f"{METRIC_NAME}_sum{{{label_str}}} {histogram['sum']}")
+        lines.append(f"{METRIC_NAME}_count{{{label_str}}} {histogram['count']}")
+
+    # Return the text
+    return "\n".join(lines) + "\n"
+
+
+# Function to export the histograms of this process to a file
+def export_metrics(path=None):
+    # Declare the time of the last export
+    global _last_export
+
+    # Fetch the path from the environment if not given
+    path = path or os.environ.get("STOCKASTIC_METRICS_FILE")
+
+    # Skip the export if no path is configured
+    if not path:
+        return
+
+    # Skip the export if this process exported recently
+    now = time.monotonic()
+    if now - _last_export < EXPORT_SECONDS:
+        return
+    _last_export = now
+
+    # Give every worker its own file so the workers do not overwrite each other
+    path = Path(path)
+    path = path.with_name(f"{path.stem}.{os.getpid()}{path.suffix}")
+
+    # Write the file atomically so scrapers never read a partial file
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(render_prometheus())
+    os.replace(tmp_path, path)